@@ -0,0 +1,277 @@
+"""
+Expectimax combat advisor for heroquest_mobile1.0.py's combat().
+
+At each hero's prompt it searches the rest of the round, and as many
+rounds after it as the time budget allows, over every action (A attack,
+D defend, M magic, I potion) and every dice outcome, using the exact
+damage distributions from odds.py. The value of a position is
+
+    P(win) + SURVIVAL_WEIGHT * E[party hit points left when the foe falls] / party max hit points
+
+plus a little for every spell and potion still unused, so among winning
+lines it prefers the ones that cost the least blood and the fewest
+resources.
+Positions past the search horizon are scored from expected damage rates.
+Searched positions go into a bounded LRU transposition table shared by
+every fight, so later prompts in a combat mostly hit the table.
+
+    python advisor.py       time a decision for the starting party
+"""
+
+import time
+from collections import OrderedDict
+
+import odds
+
+SURVIVAL_WEIGHT = 1.0
+# What an unused spell / potion is worth at the end of a won fight (one hit
+# point of the starting party is about 0.04)
+SPELL_VALUE = 0.03
+POTION_VALUE = 0.05
+MAGIC_DAMAGE = 4  # combat(): every spell does 4
+POTION_DICE = 6  # a potion heals 1d6
+BUDGET_MS = 50
+MAX_DEPTH = 6  # rounds
+CHECK_EVERY = 16  # node expansions between deadline checks
+
+
+class TimeUp(Exception):
+    """The search ran out of budget; the last finished depth is used."""
+
+
+class TranspositionTable:
+    """Position -> value, least recently used entries evicted past max_entries."""
+
+    def __init__(self, max_entries=200_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+TABLE = TranspositionTable()
+_signatures = {}  # fight stats -> small int used in table keys
+
+
+def _damage(attack_dice, defend_dice):
+    """Damage distribution for combat()'s strike() (white-shield blocks)."""
+    dist = odds.damage_distribution(attack_dice, defend_dice, "white_shields")
+    return tuple((d, p) for d, p in enumerate(dist) if p > 0)
+
+
+class CombatAdvisor:
+    def __init__(self, party, foe, table=TABLE):
+        # Everything that can't change during the fight
+        self.attack = tuple(h.calculate_atk() for h in party)
+        self.defence = tuple(h.calculate_def() - (1 if h.defending else 0) for h in party)
+        self.max_hp = tuple(h.max_hp for h in party)
+        self.foe_attack, self.foe_defence, self.foe_max = foe.base_atk, foe.base_def, foe.max_hp
+        stats = (self.attack, self.defence, self.max_hp, self.foe_attack, self.foe_defence)
+        self.sig = _signatures.setdefault(stats, len(_signatures))
+        self.table = table
+
+        self.hero_hits = [_damage(a, self.foe_defence) for a in self.attack]
+        # foe_hits[hero][defending]
+        self.foe_hits = [(_damage(self.foe_attack, d), _damage(self.foe_attack, d + 1)) for d in self.defence]
+        self.hero_rate = [sum(d * p for d, p in hits) for hits in self.hero_hits]
+        self.foe_rate = [sum(d * p for d, p in hits[0]) for hits in self.foe_hits]
+        self.total_max = sum(self.max_hp)
+        self._deadline = None
+        self._nodes = 0
+
+    # ------------------
+    # Search
+    # ------------------
+
+    def _won(self, hps, spells, potions):
+        return 1.0 + SURVIVAL_WEIGHT * sum(hps) / self.total_max + SPELL_VALUE * sum(spells) + POTION_VALUE * potions
+
+    def _horizon(self, hps, foe_hp, spells, potions):
+        """Estimate past the search depth from expected damage per round."""
+        alive = [i for i, hp in enumerate(hps) if hp > 0]
+        rate = sum(self.hero_rate[i] for i in alive)
+        if rate <= 0:
+            return 0.0
+        rounds = foe_hp / rate
+        taken = max(0.0, rounds - 1) * sum(self.foe_rate[i] for i in alive) / len(alive)
+        left = sum(hps) - taken
+        return self._won([left], spells, potions) if left > 0 else 0.0
+
+    def _tick(self):
+        self._nodes += 1
+        if self._nodes % CHECK_EVERY == 0 and self._deadline and time.perf_counter() > self._deadline:
+            raise TimeUp()
+
+    def _hero(self, turn, hps, foe_hp, spells, potions, defending, depth):
+        """Value with hero `turn` (or the first living one after it) to act."""
+        if depth == 0:
+            return self._horizon(hps, foe_hp, spells, potions)
+        n = len(hps)
+        while turn < n and hps[turn] <= 0:
+            turn += 1
+        if turn == n:
+            return self._foe(hps, foe_hp, spells, potions, defending, depth)
+        key = (self.sig, turn, hps, foe_hp, spells, potions, defending, depth)
+        value = self.table.get(key)
+        if value is None:
+            self._tick()
+            value = max(self._action(a, turn, hps, foe_hp, spells, potions, defending, depth) for a in self._legal(turn, hps, spells, potions))
+            self.table.put(key, value)
+        return value
+
+    def _legal(self, turn, hps, spells, potions):
+        actions = ["A", "D"]
+        if spells[turn]:
+            actions.append("M")
+        if potions and hps[turn] < self.max_hp[turn]:
+            actions.append("I")
+        return actions
+
+    def _action(self, action, turn, hps, foe_hp, spells, potions, defending, depth):
+        nxt = turn + 1
+        guard = defending[:turn] + (action == "D",) + defending[turn + 1 :]
+        if action == "A":
+            value = 0.0
+            for dealt, p in self.hero_hits[turn]:
+                if dealt >= foe_hp:
+                    value += p * self._won(hps, spells, potions)
+                else:
+                    value += p * self._hero(nxt, hps, foe_hp - dealt, spells, potions, guard, depth)
+            return value
+        if action == "M":
+            left = spells[:turn] + (spells[turn] - 1,) + spells[turn + 1 :]
+            if foe_hp <= MAGIC_DAMAGE:
+                return self._won(hps, left, potions)
+            return self._hero(nxt, hps, foe_hp - MAGIC_DAMAGE, left, potions, guard, depth)
+        if action == "I":
+            # Rolls that would heal past max_hp all end up the same
+            outcomes = {}
+            for heal in range(1, POTION_DICE + 1):
+                hp = min(self.max_hp[turn], hps[turn] + heal)
+                outcomes[hp] = outcomes.get(hp, 0) + 1 / POTION_DICE
+            value = 0.0
+            for hp, p in outcomes.items():
+                healed = hps[:turn] + (hp,) + hps[turn + 1 :]
+                value += p * self._hero(nxt, healed, foe_hp, spells, potions - 1, guard, depth)
+            return value
+        return self._hero(nxt, hps, foe_hp, spells, potions, guard, depth)
+
+    def _foe(self, hps, foe_hp, spells, potions, defending, depth):
+        """The foe hits a random living hero, then the next round starts."""
+        key = (self.sig, -1, hps, foe_hp, spells, potions, defending, depth)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        self._tick()
+        alive = [i for i, hp in enumerate(hps) if hp > 0]
+        value = 0.0
+        for t in alive:
+            for dealt, p in self.foe_hits[t][defending[t]]:
+                hurt = hps[:t] + (max(0, hps[t] - dealt),) + hps[t + 1 :]
+                if any(hurt):  # wiped out is worth 0
+                    value += p * self._hero(0, hurt, foe_hp, spells, potions, defending, depth - 1)
+        value /= len(alive)
+        self.table.put(key, value)
+        return value
+
+    # ------------------
+    # Public API
+    # ------------------
+
+    def evaluate(self, party, foe, hero_index, potions, budget_ms=BUDGET_MS, depth=None):
+        """
+        {action: value} for the hero at party[hero_index] to act, searched
+        as many rounds deep as budget_ms allows. With `depth` the search
+        goes exactly that many rounds deep whatever it takes, so the answer
+        doesn't depend on the machine (what simulations need).
+        """
+        hps = tuple(max(0, h.hp) for h in party)
+        spells = tuple(len(h.spells) for h in party)
+        # Heroes before this one have already picked this round
+        defending = tuple(bool(h.defending) and i < hero_index for i, h in enumerate(party))
+        legal = self._legal(hero_index, hps, spells, potions)
+        if depth is not None:
+            self._deadline = None
+            return {a: self._action(a, hero_index, hps, max(0, foe.hp), spells, potions, defending, depth) for a in legal}
+
+        best = None
+        start = last = time.perf_counter()
+        budget = budget_ms / 1000
+        spent = []
+        # Depth 0 (this hero's action, then the estimate) always finishes
+        for depth in range(0, MAX_DEPTH + 1):
+            self._deadline = None if depth == 0 else start + 0.9 * budget
+            try:
+                best = {
+                    a: self._action(a, hero_index, hps, max(0, foe.hp), spells, potions, defending, depth)
+                    for a in legal
+                }
+            except TimeUp:
+                break
+            now = time.perf_counter()
+            spent.append(now - last)
+            last = now
+            # Skip a depth that won't finish anyway: each one costs about
+            # as many times the last as the last did the one before
+            growth = spent[-1] / spent[-2] if len(spent) > 1 and spent[-2] > 0 else 4
+            if now - start + spent[-1] * max(growth, 1) > budget:
+                break
+        self._deadline = None
+        return best
+
+    def advise(self, party, foe, hero_index, potions, budget_ms=BUDGET_MS, depth=None):
+        """The recommended action letter for party[hero_index]."""
+        values = self.evaluate(party, foe, hero_index, potions, budget_ms, depth)
+        return max(values, key=values.get)
+
+
+_advisors = OrderedDict()
+
+
+def advisor_for(party, foe, table=TABLE):
+    """A (reused) advisor for this party's kit against this foe type, searching into `table`."""
+    key = (id(table), foe.char_class) + tuple(
+        (h.char_class, h.calculate_atk(), h.calculate_def() - h.defending, h.max_hp) for h in party
+    )
+    adv = _advisors.get(key)
+    if adv is None:
+        # The cached advisor keeps `table` alive, so its id can't be reused meanwhile
+        adv = _advisors[key] = CombatAdvisor(party, foe, table)
+        if len(_advisors) > 64:
+            _advisors.popitem(last=False)
+    return adv
+
+
+def advise(party, foe, hero_index, potions, budget_ms=BUDGET_MS, depth=None, table=TABLE):
+    return advisor_for(party, foe, table).advise(party, foe, hero_index, potions, budget_ms, depth)
+
+
+if __name__ == "__main__":
+    import simulate
+
+    mobile = simulate.mobile
+    for name in mobile.GAME_DATA["monsters"]:
+        party = mobile.new_party()
+        foe = mobile.Character(name, name)
+        start = time.perf_counter()
+        values = advisor_for(party, foe).evaluate(party, foe, 0, 2)
+        elapsed = (time.perf_counter() - start) * 1000
+        pretty = ", ".join(f"{a} {v:.3f}" for a, v in values.items())
+        print(f"{name:14} {elapsed:6.1f} ms  {pretty}")
+    print(f"table: {len(TABLE)} positions, {TABLE.hits} hits / {TABLE.misses} misses")
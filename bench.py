@@ -0,0 +1,303 @@
+"""
+Benchmarks for the engine hot paths.
+
+    python bench.py                 run everything and print the timings
+    python bench.py --save          ...and record them as the baseline
+    python bench.py --compare       fail (exit 1) if anything got slower than
+                                    the baseline by more than --threshold
+    python bench.py --scaling       sweep map size and entity count
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+import rules
+import simulate
+from map import Map
+from models import Dice, resolve_attacks, spawn_hero, spawn_monster
+from rng import GameRNG
+from screen import Screen
+from sight import FogOfWar
+
+BASELINE_FILE = "bench_baseline.json"
+REPEATS = 5
+
+
+class ScriptedRNG(GameRNG):
+    """Answers every combat prompt with Attack, so combat() runs unattended."""
+
+    def ask(self, prompt=""):
+        return "A"
+
+
+@contextlib.contextmanager
+def quiet():
+    """The engine prints on every hit; keep that out of the timings' output."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def time_op(fn):
+    """Best-of-REPEATS seconds per call of fn()."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+
+def time_fresh(setup, runs=REPEATS):
+    """
+    Best-of-runs seconds for ops that change what they work on: every run
+    calls setup() (untimed) for a fresh op, then times one call of it.
+    """
+    best = float("inf")
+    for _ in range(runs):
+        op = setup()
+        start = time.perf_counter()
+        op()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# --- 1. CASES ---
+
+
+def case_dice_combat():
+    return lambda: Dice.combat(4)
+
+
+def case_perform_attack(sink=None):
+    hero = spawn_hero("Bench", "Barbarian", x=1, y=1)
+    orc = spawn_monster("Orc", x=2, y=1)
+
+    def attack():
+        orc.hp = 1000
+        hero.perform_attack(orc, random, sink)
+
+    return attack
+
+
+def case_perform_attack_null():
+    return case_perform_attack(rules.NullSink())
+
+
+def _horde_pairs(count=48):
+    """count Orcs, four around each of count // 4 Dwarves, ready to strike."""
+    pairs = []
+    for i in range(count // 4):
+        dwarf = spawn_hero("Bench", "Dwarf", x=10 * i + 5, y=5)
+        for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+            pairs.append((spawn_monster("Orc", dwarf.x + dx, dwarf.y + dy), dwarf))
+    return pairs
+
+
+def case_horde_attacks():
+    pairs = _horde_pairs()
+    sink = rules.NullSink()
+
+    def attack():
+        for _, dwarf in pairs:
+            dwarf.hp = 1000
+        for orc, dwarf in pairs:
+            orc.perform_attack(dwarf, random, sink)
+
+    return attack
+
+
+def case_resolve_attacks():
+    import numpy as np
+
+    pairs = _horde_pairs()
+    sink = rules.NullSink()
+    rng = np.random.default_rng(0)
+
+    def attack():
+        for _, dwarf in pairs:
+            dwarf.hp = 1000
+        resolve_attacks(pairs, rng, sink)
+
+    return attack
+
+
+def case_defence_dice():
+    hero = spawn_hero("Bench", "Dwarf")
+    hero.equip("Helmet")
+    hero.equip("Chain Mail")
+    return hero.calculate_defence_dice
+
+
+def case_spawn_hero():
+    return lambda: spawn_hero("Bench", "Wizard", chosen_spells=["Fire", "Water"])
+
+
+def case_spawn_monster():
+    return lambda: spawn_monster("Goblin", 3, 3)
+
+
+def case_render(width=26, height=19, entities=10, seed=1):
+    game_map = Map(width, height)
+    rnd = random.Random(seed)
+    for _ in range(entities):
+        game_map.place(spawn_monster("Goblin", rnd.randrange(width), rnd.randrange(height)))
+    screen = Screen(offscreen=True)
+    return lambda: game_map.render(screen=screen)
+
+
+def case_fog(width=26, height=19, radius=8):
+    """One hero step with fog of war on: sight window (built on first visit) plus fog update."""
+    game_map = Map(width, height, sight_radius=radius)
+    fog = FogOfWar(game_map)
+    hero = spawn_hero("Bench", "Elf", x=0, y=height // 2)
+
+    def step():
+        hero.x = (hero.x + 1) % width
+        fog.update([hero])
+
+    return step
+
+
+def case_mobile_combat():
+    mobile = simulate.mobile
+    rng = ScriptedRNG(7)
+
+    def fight():
+        rng.events.clear()
+        party = mobile.new_party()
+        # Headless only while fighting, so nothing else sees the flag flipped
+        headless, mobile.HEADLESS = mobile.HEADLESS, True
+        try:
+            mobile.combat(party, 0, [], 1, 1, 4, rng)
+        finally:
+            mobile.HEADLESS = headless
+
+    return fight
+
+
+CASES = {
+    "Dice.combat(4)": case_dice_combat,
+    "Entity.perform_attack": case_perform_attack,
+    "Entity.perform_attack (null sink)": case_perform_attack_null,
+    "perform_attack x48 (null sink)": case_horde_attacks,
+    "resolve_attacks x48 (null sink)": case_resolve_attacks,
+    "Hero.calculate_defence_dice": case_defence_dice,
+    "spawn_hero": case_spawn_hero,
+    "spawn_monster": case_spawn_monster,
+    "Map.render (offscreen)": case_render,
+    "mobile combat() scripted": case_mobile_combat,
+}
+
+
+def run_all():
+    results = {}
+    with quiet():
+        for name, make in CASES.items():
+            results[name] = time_op(make())
+    return results
+
+
+# --- 2. BASELINE & COMPARISON ---
+
+
+def report(results, baseline=None):
+    for name, seconds in results.items():
+        line = f"{name:32} {seconds * 1e6:12.2f} us"
+        if baseline and name in baseline:
+            change = seconds / baseline[name] - 1
+            line += f"   {change:+7.1%} vs baseline"
+        print(line)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    with open(path, "w") as f:
+        json.dump(
+            {"python": platform.python_version(), "machine": platform.machine(), "results": results},
+            f,
+            indent=2,
+        )
+
+
+def compare(results, threshold, path=BASELINE_FILE):
+    """Names of the cases that are more than `threshold` slower than the baseline."""
+    with open(path, "r") as f:
+        baseline = json.load(f)["results"]
+    report(results, baseline)
+    return [
+        name
+        for name, seconds in results.items()
+        if name in baseline and seconds > baseline[name] * (1 + threshold)
+    ]
+
+
+# --- 3. SCALING ---
+
+
+def scaling(sizes=((26, 19), (100, 100), (300, 300), (1000, 1000)), counts=(10, 100, 1000)):
+    """Render, fog-of-war and Zargon-phase cost as the map and the horde grow."""
+    import turns
+
+    print(f"{'map':>9} {'entities':>9} {'render ms':>10} {'fog ms':>10} {'zargon ms':>10}")
+    for width, height in sizes:
+        for count in counts:
+            if count > width * height // 2:
+                continue
+            with quiet():
+                render = time_op(case_render(width, height, count))
+                fog = time_op(case_fog(width, height))
+
+                def zargon():
+                    # The phase moves the horde and hurts the hero, so every
+                    # sample starts from the same freshly built board
+                    game_map = Map(width, height)
+                    rnd = random.Random(count)
+                    hero = spawn_hero("Bench", "Barbarian", x=width // 2, y=height // 2)
+                    hero.hp = 1000
+                    game_map.place(hero)
+                    monsters = []
+                    while len(monsters) < count:
+                        m = spawn_monster("Goblin", rnd.randrange(width), rnd.randrange(height))
+                        if game_map.place(m):
+                            monsters.append(m)
+                    return lambda: turns.zargon_phase(game_map, [hero], monsters, random.Random(count))
+
+                zargon_time = time_fresh(zargon)
+            print(
+                f"{width:>4}x{height:<4} {count:>9} {render * 1e3:>10.3f} {fog * 1e3:>10.3f} {zargon_time * 1e3:>10.3f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HeroQuest engine benchmarks")
+    parser.add_argument("--save", action="store_true", help="record results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="fail on regressions vs the baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--scaling", action="store_true", help="sweep map size and entity count")
+    args = parser.parse_args()
+
+    if args.scaling:
+        scaling()
+        return 0
+
+    results = run_all()
+    if args.compare:
+        slower = compare(results, args.threshold, args.baseline)
+        if slower:
+            print(f"\nREGRESSION (> {args.threshold:.0%} slower): {', '.join(slower)}")
+            return 1
+        print("\nNo regressions.")
+    else:
+        report(results)
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,255 @@
-import json
+import os
+import sys
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
 
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(HERE, "gamedata.json")
+CACHE_FILE = os.path.join(HERE, ".gamedata.cache")
 
-def load_game_data(filepath="gamedata.json"):
+# Loading (cache hit or not) should never hold up startup longer than this
+STARTUP_BUDGET_MS = 50
+
+
+class GameDataError(ValueError):
+    """gamedata.json is missing sections or has entries of the wrong shape."""
+
+
+# ==========================================
+# 1. SCHEMA
+# ==========================================
+# field -> (allowed types, required?)
+
+INT = (int,)
+BOOL = (bool,)
+STR = (str,)
+
+SCHEMA = {
+    "heroes": {
+        "hp": (INT, True),
+        "mp": (INT, True),
+        "attack": (INT, True),
+        "defend": (INT, True),
+        "primary_weapon": (STR, True),
+        "alignment": (STR, False),
+        "is_spellcaster": (BOOL, True),
+    },
+    "monsters": {
+        "movement": (INT, True),
+        "attack": (INT, True),
+        "defend": (INT, True),
+        "hp": (INT, True),
+        "mp": (INT, True),
+        "alignment": (STR, False),
+    },
+    "weapons": {
+        "cost": (INT, True),
+        "attack_bonus": (INT, True),
+        "diagonal": (BOOL, False),
+        "two_handed": (BOOL, False),
+        "thrown": (BOOL, False),
+        "wizard_ok": (BOOL, True),
+    },
+    "armour": {
+        "cost": (INT, True),
+        "defence_bonus": (INT, True),
+        "wizard_ok": (BOOL, True),
+        "slot": (STR + (type(None),), True),
+        "move_penalty": (INT, False),
+        "is_off_hand": (BOOL, False),
+    },
+    "items": {
+        "cost": (INT, True),
+    },
+}
+
+SPELL_TYPES = {"Attack", "Heal", "Buff", "CC", "Utility"}
+SPELL_SCHEMA = {
+    "name": (STR, True),
+    "type": (STR, True),
+    "dice": (INT, False),
+    "damage": (INT, False),
+    "value": (INT, False),
+    "bonus": (INT, False),
+    "stat": (STR, False),  # what a Buff raises: "attack" or "defence"
+    "area": (INT, False),  # radius in squares; hits everyone in range
+    "turns": (INT, False),  # how long a CC spell holds its targets
+}
+
+
+def _check_fields(where, entry, fields, errors):
+    if not isinstance(entry, dict):
+        errors.append(f"{where}: expected an object, got {type(entry).__name__}")
+        return
+    for field, (types, required) in fields.items():
+        if field not in entry:
+            if required:
+                errors.append(f"{where}: missing '{field}'")
+        elif not isinstance(entry[field], types) or (
+            types == INT and isinstance(entry[field], bool)
+        ):
+            errors.append(f"{where}.{field}: wrong type {type(entry[field]).__name__}")
+
+
+def validate(raw):
+    """Returns a list of problems with the raw JSON data (empty if it's fine)."""
+    errors = []
+    if not isinstance(raw, dict):
+        return ["top level: expected an object"]
+
+    for section in list(SCHEMA) + ["spells"]:
+        if not isinstance(raw.get(section), dict):
+            errors.append(f"missing section '{section}'")
+    for section in raw:
+        if section not in SCHEMA and section != "spells":
+            errors.append(f"unknown section '{section}' (misplaced brace?)")
+    if errors:
+        return errors
+
+    for section, fields in SCHEMA.items():
+        for name, entry in raw[section].items():
+            _check_fields(f"{section}.{name}", entry, fields, errors)
+
+    for element, spells in raw["spells"].items():
+        if not isinstance(spells, list):
+            errors.append(f"spells.{element}: expected a list")
+            continue
+        for i, spell in enumerate(spells):
+            _check_fields(f"spells.{element}[{i}]", spell, SPELL_SCHEMA, errors)
+            if isinstance(spell, dict) and spell.get("type") not in SPELL_TYPES:
+                errors.append(f"spells.{element}[{i}]: unknown type {spell.get('type')!r}")
+
+    for name, hero in raw["heroes"].items():
+        if isinstance(hero, dict) and hero.get("primary_weapon") not in raw["weapons"]:
+            errors.append(f"heroes.{name}: unknown weapon {hero.get('primary_weapon')!r}")
+    if "Empty" not in raw["armour"] or "Unarmed" not in raw["weapons"]:
+        errors.append("armour.Empty and weapons.Unarmed are required")
+    return errors
+
+
+# ==========================================
+# 2. COMPILE, CACHE & FREEZE
+# ==========================================
+
+
+def compile_data(raw):
+    """Adds the derived lookup tables (currently spells_by_name)."""
+    compiled = dict(raw)
+    compiled["spells_by_name"] = {
+        spell["name"]: dict(spell, element=element)
+        for element, spells in raw["spells"].items()
+        for spell in spells
+    }
+    return compiled
+
+
+def freeze(value):
+    """Read-only copy: dicts become mapping proxies, lists become tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def _read_cache(digest, cache_file):
+    import pickle
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_digest, compiled = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return compiled if cached_digest == digest else None
+
+
+def _write_cache(digest, compiled, cache_file):
+    import pickle
+
+    tmp = cache_file + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump((digest, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # a read-only install just goes without the cache
+
+
+LOAD_TIME_MS = None
+
+
+def load_game_data(filepath=DATA_FILE, cache_file=CACHE_FILE):
+    # json/pickle/hashlib are imported here rather than at the top so that
+    # "import models" stays cheap until the data is actually needed
+    import hashlib
+    import json
+
+    global LOAD_TIME_MS
+    start = time.perf_counter()
     try:
-        with open(filepath, "r") as f:
-            return json.load(f)
+        with open(filepath, "rb") as f:
+            blob = f.read()
     except FileNotFoundError:
         print(f"Error: {filepath} not found.")
-        return {}
+        return freeze({})
+
+    digest = hashlib.sha256(blob).hexdigest()
+    compiled = _read_cache(digest, cache_file)
+    if compiled is None:
+        raw = json.loads(blob)
+        errors = validate(raw)
+        if errors:
+            raise GameDataError(f"{filepath} is invalid:\n  " + "\n  ".join(errors))
+        compiled = compile_data(raw)
+        _write_cache(digest, compiled, cache_file)
+
+    frozen = freeze(compiled)
+    LOAD_TIME_MS = (time.perf_counter() - start) * 1000
+    return frozen
+
+
+class LazyGameData(Mapping):
+    """
+    Stands in for the game data until somebody actually reads it, so
+    importing models (and friends) doesn't touch the disk.
+    """
+
+    def __init__(self, section=None):
+        self._section = section
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            if self._section is None:
+                self._data = load_game_data()
+            else:
+                self._data = GAME_DATA.get(self._section, MappingProxyType({}))
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._data is not None else "not loaded"
+        return f"<LazyGameData {self._section or 'all'} ({state})>"
+
+
+# Load global libraries (on first use)
+GAME_DATA = LazyGameData()
+SPELLS_BY_NAME = LazyGameData("spells_by_name")
 
 
-# Load global libraries
-GAME_DATA = load_game_data()
+if __name__ == "__main__":
+    # Startup check: python data.py
+    load_game_data()
+    cold = LOAD_TIME_MS
+    load_game_data()
+    print(f"gamedata load: first {cold:.2f} ms, cached {LOAD_TIME_MS:.2f} ms (budget {STARTUP_BUDGET_MS} ms)")
+    sys.exit(0 if max(cold, LOAD_TIME_MS) <= STARTUP_BUDGET_MS else 1)
@@ -0,0 +1,130 @@
+import random
+import threading
+from collections import OrderedDict, deque
+
+# ==========================================
+# PROCEDURAL FLOORS
+# ==========================================
+# A floor is a list of rooms, each with the monster guarding it and what a
+# search turns up. Every floor is rolled from its own Random seeded with
+# "<campaign seed>:<floor>", so a floor comes out the same whichever thread
+# builds it and whenever it is built: prefetching never changes the game,
+# and a logged campaign seed is enough to replay it.
+
+
+def rooms_on(floor):
+    """Deeper floors have more rooms."""
+    return 4 + floor // 5
+
+
+def monster_weights(monsters, floor):
+    """
+    Chance of each monster type on a floor, from its reward: weight
+    reward ** (floor / 10 - 1). Weak monsters dominate the first floors,
+    every type is equally likely on floor 10 and the tough ones take over
+    from there.
+    """
+    power = floor / 10 - 1
+    return [stats["reward"] ** power for stats in monsters.values()]
+
+
+def roll_treasure(rnd, table):
+    """One search result from a weighted treasure table."""
+    entry = rnd.choices(table, weights=[t["weight"] for t in table])[0]
+    if "trap" in entry:
+        return {"trap": entry["trap"]}
+    low, high = entry["gold"]
+    return {"gold": rnd.randint(low, high)}
+
+
+def generate_floor(seed, floor, game_data):
+    """
+    Builds one floor from game_data["monsters"] (each with a "reward") and
+    game_data["treasure"]. Returns {"floor": n, "rooms": [{"monster": name,
+    "treasure": {"gold": n} or {"trap": damage}}, ...]}.
+    """
+    rnd = random.Random(f"{seed}:{floor}")
+    names = list(game_data["monsters"])
+    weights = monster_weights(game_data["monsters"], floor)
+    rooms = []
+    for _ in range(rooms_on(floor)):
+        rooms.append(
+            {
+                "monster": rnd.choices(names, weights=weights)[0],
+                "treasure": roll_treasure(rnd, game_data["treasure"]),
+            }
+        )
+    return {"floor": floor, "rooms": rooms}
+
+
+class FloorGenerator:
+    """
+    Generates floors on a worker thread, keeping the next `ahead` floors
+    ready in a bounded cache. get(floor) returns straight from the cache and
+    queues the floors after it; on a miss it builds the floor itself.
+    """
+
+    def __init__(self, seed, game_data, ahead=3):
+        self.seed = seed
+        self.game_data = game_data
+        self.ahead = ahead
+        # Current floor, the prefetched ones and one spare
+        self.limit = ahead + 2
+        self._cache = OrderedDict()
+        self._wanted = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def _store(self, floor, plan):
+        self._cache[floor] = plan
+        self._cache.move_to_end(floor)
+        while len(self._cache) > self.limit:
+            self._cache.popitem(last=False)
+
+    def prefetch(self, floor):
+        """Queues `floor` and the `ahead` floors after it for the worker."""
+        with self._cond:
+            if self._closed:
+                return
+            for f in range(floor, floor + self.ahead + 1):
+                if f not in self._cache and f not in self._wanted:
+                    self._wanted.append(f)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="floor-generator", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def get(self, floor):
+        with self._cond:
+            plan = self._cache.get(floor)
+            if plan is not None:
+                self._cache.move_to_end(floor)
+        if plan is None:
+            plan = generate_floor(self.seed, floor, self.game_data)
+            with self._cond:
+                self._store(floor, plan)
+        self.prefetch(floor + 1)
+        return plan
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._wanted and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                floor = self._wanted.popleft()
+                if floor in self._cache:
+                    continue
+            plan = generate_floor(self.seed, floor, self.game_data)
+            with self._cond:
+                self._store(floor, plan)
+
+    def close(self):
+        """Stops the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,7 +1,15 @@
 import random
-import os
+import sys
 import time
-import json
+
+import instrument
+import rules
+from advisor import advise
+from floors import FloorGenerator
+from instrument import timed
+from rng import GameRNG, ReplayFinished, ReplayRNG
+from savegame import SaveJournal
+from screen import TERMINAL
 
 
 # --- GRUVBOX COLOR PALETTE ---
@@ -18,6 +26,13 @@ class Col:
 
 SCREEN_WIDTH = 60  # Slightly wider for laptop
 
+# Replays run with HEADLESS on: no drawing, no sleeps, no disk saves
+HEADLESS = False
+REPLAY_FILE = "heroquest_replay.json"
+# Where combat events go (the HUD shows its own one-line summary);
+# `--events path` logs them as JSON lines
+EVENT_SINK = rules.NullSink()
+
 
 def center(text, color=Col.RST):
     padding = max(0, (SCREEN_WIDTH - len(text)) // 2)
@@ -48,6 +63,11 @@ GAME_DATA = {
         {"name": "Shield", "type": "shield", "def": 1, "cost": 150},
         {"name": "Potion of Healing", "type": "item", "cost": 100},
     ],
+    # What searching a cleared room turns up (weighted)
+    "treasure": [
+        {"weight": 1, "trap": 2},
+        {"weight": 2, "gold": [20, 50]},
+    ],
 }
 
 
@@ -89,7 +109,24 @@ class Character:
 # --- 2. SAVE/LOAD LOGIC ---
 
 
-def save_game(party, gold, floor, inv):
+_journal = None
+
+
+def journal():
+    """The save journal, started on first use (so imports stay side-effect free)."""
+    global _journal
+    if _journal is None:
+        _journal = SaveJournal("heroquest_save.json")
+    return _journal
+
+
+@timed("save")
+def save_game(party, gold, floor, inv, compact=True, wait=False):
+    """
+    Queues the changes since the last save for the background writer.
+    compact=True also folds the journal into a fresh heroquest_save.json;
+    wait=True blocks until it's written (raising the error if it wasn't).
+    """
     data = {
         "gold": gold,
         "floor": floor,
@@ -108,150 +145,261 @@ def save_game(party, gold, floor, inv):
             for h in party
         ],
     }
-    with open("heroquest_save.json", "w") as f:
-        json.dump(data, f)
+    if HEADLESS:
+        return "DISK ACCESS: SKIPPED"
+    journal().record(data)
+    if compact:
+        journal().compact()
+    if wait:
+        journal().flush()
     return "DISK ACCESS: SUCCESSFUL"
 
 
+@timed("save")
+def load_game(rng=None):
+    """Rebuilds (party, gold, floor, inventory) from the save, or None if there isn't one."""
+    # Through the RNG log, so a replay sees the save as it was when played
+    data = rng.external("load", lambda: journal().load()) if rng else journal().load()
+    if not data:
+        return None
+    party = []
+    for saved in data["heroes"]:
+        h = Character(saved["class"], saved["class"])
+        h.hp, h.max_hp = saved["hp"], saved["max_hp"]
+        h.weapon, h.body_armour, h.shield = saved["wpn"], saved["bdy"], saved["shd"]
+        h.helmet, h.bracers = saved["hlm"], saved["brc"]
+        party.append(h)
+    return party, data["gold"], data["floor"], list(data["inventory"])
+
+
 # --- 3. UI ---
 
 
+@timed("render")
 def draw_hud(
-    party, gold, inv, floor, room=None, total=None, msg="", foe=None, town=True
+    party, gold, inv, floor, room=None, total=None, msg="", foe=None, town=True, screen=TERMINAL
 ):
-    os.system("cls" if os.name == "nt" else "clear")
+    if HEADLESS:
+        return None
     title = "TOWN HUB" if town else f"DUNGEON F:{floor} R:{room}/{total}"
-    print(center(title, Col.HDR + Col.BOLD))
-    print(center(f"GOLD: {gold} | POTIONS: {inv.count('Potion of Healing')}", Col.GLD))
-    print(Col.EQU + "—" * SCREEN_WIDTH + Col.RST)
+    lines = [
+        center(title, Col.HDR + Col.BOLD),
+        center(f"GOLD: {gold} | POTIONS: {inv.count('Potion of Healing')}", Col.GLD),
+        Col.EQU + "—" * SCREEN_WIDTH + Col.RST,
+    ]
 
     for h in party:
         c = Col.HPG if h.hp > (h.max_hp / 2) else Col.HPR
-        print(
+        lines.append(
             f" {Col.BOLD}{h.name.upper():9}{Col.RST} HP: {c}{h.hp}/{h.max_hp}{Col.RST} | ATK: {Col.HPR}{h.calculate_atk()}{Col.RST} | DEF: {Col.EQU}{h.calculate_def()}{Col.RST}"
         )
-        print(
+        lines.append(
             f" {' ':10} {Col.GLD}WPN: {h.weapon['name']} | BDY: {h.body_armour['name']} | SHD: {h.shield['name']}{Col.RST}"
         )
         if h.spells:
-            print(f" {' ':10} {Col.MAG}MAGIC: {', '.join(h.spells)}{Col.RST}")
-        print(Col.EQU + "—" * SCREEN_WIDTH + Col.RST)
+            lines.append(f" {' ':10} {Col.MAG}MAGIC: {', '.join(h.spells)}{Col.RST}")
+        lines.append(Col.EQU + "—" * SCREEN_WIDTH + Col.RST)
 
     if msg:
-        print("\n" + center(msg, Col.BOLD))
+        lines += ["", center(msg, Col.BOLD)]
     if foe:
-        print(center(f"VS: {foe.name} (HP: {foe.hp}/{foe.max_hp})", Col.HPR))
+        lines.append(center(f"VS: {foe.name} (HP: {foe.hp}/{foe.max_hp})", Col.HPR))
 
-    print("\n" + Col.HDR + "=" * SCREEN_WIDTH + Col.RST)
+    lines += ["", Col.HDR + "=" * SCREEN_WIDTH + Col.RST]
     if town:
-        print(center("[C] Continue | [S] Shop | [V] Save | [H] Heal All", Col.BOLD))
+        lines.append(center("[C] Continue | [S] Shop | [V] Save | [L] Load | [H] Heal All", Col.BOLD))
     else:
-        print(center("[A] Attack | [D] Defend | [M] Magic | [I] Potion", Col.BOLD))
-    print(Col.HDR + "=" * SCREEN_WIDTH + Col.RST)
+        lines.append(center("[A] Attack | [D] Defend | [M] Magic | [I] Potion", Col.BOLD))
+    lines.append(Col.HDR + "=" * SCREEN_WIDTH + Col.RST)
+    # Only the cells that changed since the last HUD reach the terminal
+    return screen.present(lines)
 
 
 # --- 4. ENGINE ---
 
 
-def combat(party, gold, inv, floor, room, total):
-    m_name = random.choice(list(GAME_DATA["monsters"].keys()))
+def pause(seconds):
+    if not HEADLESS:
+        time.sleep(seconds)
+
+
+def say(text):
+    if not HEADLESS:
+        print(text)
+
+
+@timed("combat")
+def strike(attacker, target, atk, dfn, rng=random):
+    """
+    One attack through the rules core: hits and blocks have the odds of
+    skulls and white shields (the old 4+ / 5+). Updates target.hp and
+    returns the damage dealt.
+    """
+    target.hp, events = rules.attack(attacker.name, target.name, atk, dfn, "white_shields", target.hp, rng)
+    rules.emit(events, EVENT_SINK)
+    return events[0]["damage"]
+
+
+def new_party():
+    p = [
+        Character("Barbarian", "Barbarian"),
+        Character("Dwarf", "Dwarf"),
+        Character("Elf", "Elf"),
+        Character("Wizard", "Wizard"),
+    ]
+    p[0].weapon = {"name": "Masterwork Blade", "atk": 5}
+    return p
+
+
+def combat(party, gold, inv, floor, room, total, rng, m_name=None):
+    m_name = m_name or rng.choice(list(GAME_DATA["monsters"].keys()))
     foe = Character(m_name, m_name)
     msg = f"A {foe.name} blocks your path!"
 
     while foe.hp > 0 and any(h.hp > 0 for h in party):
         draw_hud(party, gold, inv, floor, room, total, msg, foe, False)
-        for h in party:
+        for i, h in enumerate(party):
             if h.hp <= 0 or foe.hp <= 0:
                 continue
             h.defending = False
-            act = input(f" [{h.name[:4]}] Command: ").upper()
+            # The advisor's pick goes in the prompt (not in the log, so replays skip it)
+            hint = "" if HEADLESS else f" ({advise(party, foe, i, inv.count('Potion of Healing'))}?)"
+            act = rng.ask(f" [{h.name[:4]}] Command{hint}: ").upper()
             if act == "A":
-                dmg = max(
-                    0,
-                    sum(1 for _ in range(h.calculate_atk()) if random.randint(1, 6) > 3)
-                    - sum(1 for _ in range(foe.base_def) if random.randint(1, 6) > 4),
-                )
-                foe.hp -= dmg
+                dmg = strike(h, foe, h.calculate_atk(), foe.base_def, rng)
                 msg = f"{h.name} deals {dmg} DMG."
             elif act == "M" and h.spells:
                 spell = h.spells.pop(0)
-                foe.hp -= 4
+                foe.hp, events = rules.damage(foe.name, foe.hp, 4)
+                rules.emit([{"type": "cast", "caster": h.name, "spell": spell}] + events, EVENT_SINK)
                 msg = f"{h.name} cast {spell}!"
             elif act == "D":
                 h.defending = True
                 msg = f"{h.name} is defending."
+            elif act == "I" and "Potion of Healing" in inv:
+                inv.remove("Potion of Healing")
+                heal = rng.randint(1, 6)
+                h.hp = min(h.max_hp, h.hp + heal)
+                msg = f"{h.name} drinks a potion (+{heal} HP)."
             draw_hud(party, gold, inv, floor, room, total, msg, foe, False)
-            time.sleep(0.2)
+            pause(0.2)
 
         if foe.hp > 0:
-            t = random.choice([h for h in party if h.hp > 0])
-            dmg = max(
-                0,
-                sum(1 for _ in range(foe.base_atk) if random.randint(1, 6) > 3)
-                - sum(1 for _ in range(t.calculate_def()) if random.randint(1, 6) > 4),
-            )
-            t.hp -= dmg
+            t = rng.choice([h for h in party if h.hp > 0])
+            dmg = strike(foe, t, foe.base_atk, t.calculate_def(), rng)
             msg = f"{foe.name} retaliates! {t.name} takes {dmg}."
-            time.sleep(0.5)
+            pause(0.5)
+        instrument.end_turn()
 
     if foe.hp <= 0:
-        print(center(f"VICTORY! +{foe.reward} Gold.", Col.HPG))
-        time.sleep(1)
+        say(center(f"VICTORY! +{foe.reward} Gold.", Col.HPG))
+        pause(1)
         return gold + foe.reward, inv
     return gold, inv
 
 
-def main():
+def main(rng=None):
+    # Every roll and command goes through one RNG so the game can be replayed
+    rng = rng or GameRNG()
     # Initial Start
-    p = [
-        Character("Barbarian", "Barbarian"),
-        Character("Dwarf", "Dwarf"),
-        Character("Elf", "Elf"),
-        Character("Wizard", "Wizard"),
-    ]
-    p[0].weapon = {"name": "Masterwork Blade", "atk": 5}
+    p = new_party()
     g, f, inv = 1226, 13, ["Potion of Healing"] * 2
-
-    while True:
-        if not any(h.hp > 0 for h in p):
-            print(center("DEFEATED. RESTART? (Y/N)", Col.HPR))
-            if input().upper() == "Y":
-                main()
-            else:
+    # Floors are generated ahead of time on a worker thread from one seed
+    floors = FloorGenerator(rng.randint(0, 2**32 - 1), GAME_DATA)
+    floors.prefetch(f)
+
+    try:
+        while True:
+            if not any(h.hp > 0 for h in p):
+                say(center("DEFEATED. RESTART? (Y/N)", Col.HPR))
+                if rng.ask().upper() == "Y":
+                    return main(rng)
                 break
 
-        draw_hud(p, g, inv, f, town=True)
-        choice = input(" Town Command: ").upper()
-
-        if choice == "C":
-            rooms = 4 + (f // 5)
-            for r in range(1, rooms + 1):
-                if not any(h.hp > 0 for h in p):
-                    break
-                g, inv = combat(p, g, inv, f, r, rooms)
-                if r < rooms:
-                    draw_hud(
-                        p, g, inv, f, r, rooms, "Search for Treasure? (Y/N)", town=False
-                    )
-                    if input().upper() == "Y":
-                        res = random.randint(1, 3)
-                        if res == 1:
-                            p[0].hp -= 2
-                            print(center("TRAP! -2 HP", Col.HPR))
-                        else:
-                            find = random.randint(20, 50)
-                            g += find
-                            print(center(f"Found {find} Gold!", Col.GLD))
-                        time.sleep(1)
-            f += 1
-            for h in p:
-                h.spells = GAME_DATA["heroes"][h.char_class]["spells"].copy()
-
-        elif choice == "V":
-            save_game(p, g, f, inv)
-            print(center("GAME SAVED TO heroquest_save.json", Col.HPG))
-            time.sleep(1)
+            instrument.end_turn()
+            draw_hud(p, g, inv, f, town=True)
+            choice = rng.ask(" Town Command: ").upper()
+
+            if choice == "C":
+                plan = floors.get(f)["rooms"]
+                rooms = len(plan)
+                for r, room in enumerate(plan, start=1):
+                    if not any(h.hp > 0 for h in p):
+                        break
+                    g, inv = combat(p, g, inv, f, r, rooms, rng, room["monster"])
+                    save_game(p, g, f, inv, compact=False)
+                    if r < rooms:
+                        draw_hud(
+                            p, g, inv, f, r, rooms, "Search for Treasure? (Y/N)", town=False
+                        )
+                        if rng.ask().upper() == "Y":
+                            found = room["treasure"]
+                            if "trap" in found:
+                                p[0].hp, events = rules.damage(p[0].name, p[0].hp, found["trap"])
+                                rules.emit(events, EVENT_SINK)
+                                say(center(f"TRAP! -{found['trap']} HP", Col.HPR))
+                            else:
+                                find = found["gold"]
+                                g += find
+                                say(center(f"Found {find} Gold!", Col.GLD))
+                            pause(1)
+                f += 1
+                for h in p:
+                    h.spells = GAME_DATA["heroes"][h.char_class]["spells"].copy()
+                save_game(p, g, f, inv, compact=False)
+
+            elif choice == "V":
+                try:
+                    save_game(p, g, f, inv, wait=True)
+                except (OSError, TypeError, ValueError) as e:
+                    say(center(f"SAVE FAILED: {e}", Col.HPR))
+                else:
+                    say(center("GAME SAVED TO heroquest_save.json", Col.HPG))
+                pause(1)
+
+            elif choice == "L":
+                loaded = load_game(rng)
+                if loaded:
+                    p, g, f, inv = loaded
+                    floors.prefetch(f)
+                    say(center("GAME LOADED", Col.HPG))
+                else:
+                    say(center("NO SAVE FOUND", Col.HPR))
+                pause(1)
+    except ReplayFinished:
+        pass
+    finally:
+        floors.close()
+        if not HEADLESS:
+            rng.save(REPLAY_FILE)
+    return p, g, f, inv
+
+
+def replay(path=None):
+    """
+    Re-runs a logged game with no drawing, sleeps or disk saves and returns
+    the final (party, gold, floor, inventory). Raises ReplayDiverged if any
+    roll or prompt doesn't line up with the log.
+    """
+    global HEADLESS
+    HEADLESS = True
+    try:
+        return main(ReplayRNG.from_file(path or REPLAY_FILE))
+    finally:
+        HEADLESS = False
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 2 and sys.argv[1] == "--events":
+        EVENT_SINK = rules.JsonLogSink(sys.argv[2])
+        del sys.argv[1:3]
+    try:
+        if len(sys.argv) > 2 and sys.argv[1] == "--replay":
+            party, gold, floor, inv = replay(sys.argv[2])
+            hp = ", ".join(f"{h.name} {h.hp}/{h.max_hp}" for h in party)
+            print(f"Replay OK: floor {floor}, gold {gold}, {hp}")
+        else:
+            main()
+    finally:
+        if isinstance(EVENT_SINK, rules.JsonLogSink):
+            EVENT_SINK.close()
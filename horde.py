@@ -0,0 +1,129 @@
+import numpy as np
+
+from data import GAME_DATA
+from models import Monster
+
+# ==========================================
+# ENTITY TABLE
+# ==========================================
+# Struct-of-arrays storage for big monster counts. Each stat is one NumPy
+# column and a monster is just a row number, so spawning or damaging a
+# thousand Goblins is a handful of array operations instead of a thousand
+# Monster objects.
+
+
+class EntityTable:
+    COLUMNS = {
+        "kind": np.int16,  # index into self.kinds
+        "hp": np.int16,
+        "mp": np.int16,
+        "x": np.int32,
+        "y": np.int32,
+        "attack": np.int8,
+        "defend": np.int8,
+        "movement": np.int8,
+    }
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.kinds = []  # monster type names, in order of first spawn
+        self._kind_ids = {}
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        capacity = len(self.hp)
+        if self.size + needed <= capacity:
+            return
+        new_capacity = max(capacity * 2, self.size + needed)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            setattr(self, name, grown)
+
+    def _kind_id(self, monster_type):
+        kind = self._kind_ids.get(monster_type)
+        if kind is None:
+            kind = self._kind_ids[monster_type] = len(self.kinds)
+            self.kinds.append(monster_type)
+        return kind
+
+    # ------------------
+    # Spawning
+    # ------------------
+
+    def spawn_bulk(self, monster_type, xs, ys):
+        """
+        Adds one monster of `monster_type` per (x, y) pair, using the same
+        template defaults as spawn_monster(). Returns the new row numbers.
+        """
+        template = GAME_DATA.get("monsters", {}).get(monster_type)
+        if not template:
+            print(f"CRITICAL ERROR: Monster type '{monster_type}' not found in data!")
+            return np.arange(0)
+
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        count = len(xs)
+        self._grow(count)
+        rows = slice(self.size, self.size + count)
+
+        self.kind[rows] = self._kind_id(monster_type)
+        self.hp[rows] = template.get("hp", 1)
+        self.mp[rows] = template.get("mp", 0)
+        self.attack[rows] = template.get("attack", 2)
+        self.defend[rows] = template.get("defend", 2)
+        self.movement[rows] = template.get("movement", 6)
+        self.x[rows] = xs
+        self.y[rows] = ys
+
+        self.size += count
+        return np.arange(rows.start, rows.stop)
+
+    def spawn(self, monster_type, x=0, y=0):
+        rows = self.spawn_bulk(monster_type, [x], [y])
+        return int(rows[0]) if len(rows) else None
+
+    # ------------------
+    # Bulk updates
+    # ------------------
+
+    def alive(self):
+        """Row numbers of every monster still standing."""
+        return np.flatnonzero(self.hp[: self.size] > 0)
+
+    def take_damage(self, rows, amounts):
+        """Vectorised Entity.take_damage. Returns the rows that just died."""
+        hit = np.unique(rows)
+        before = self.hp[hit] > 0
+        np.subtract.at(self.hp, rows, amounts)
+        np.maximum(self.hp[: self.size], 0, out=self.hp[: self.size])
+        return hit[before & (self.hp[hit] == 0)]
+
+    def move(self, rows, dx, dy):
+        np.add.at(self.x, rows, dx)
+        np.add.at(self.y, rows, dy)
+
+    # ------------------
+    # Object views
+    # ------------------
+
+    def to_monster(self, row):
+        """A regular Monster copy of one row, for code that wants objects."""
+        return Monster(
+            char_class=self.kinds[self.kind[row]],
+            movement=int(self.movement[row]),
+            attack=int(self.attack[row]),
+            defend=int(self.defend[row]),
+            hp=int(self.hp[row]),
+            mp=int(self.mp[row]),
+            x=int(self.x[row]),
+            y=int(self.y[row]),
+        )
+
+    def nbytes(self):
+        return sum(getattr(self, name)[: self.size].nbytes for name in self.COLUMNS)
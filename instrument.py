@@ -0,0 +1,118 @@
+"""
+Opt-in hot-path instrumentation.
+
+    HEROQUEST_PROFILE=1 python main.py
+
+counts calls and times every function wrapped with @timed(...) (rendering,
+combat, movement, spells, saves, monster AI) and appends one JSON summary
+line per turn to heroquest_profile.jsonl (HEROQUEST_PROFILE_FILE to change).
+HEROQUEST_CPROFILE=N additionally runs cProfile over the first N turns and
+writes heroquest.prof (open it with `python -m pstats heroquest.prof`).
+
+With HEROQUEST_PROFILE unset, @timed hands back the original function, so
+the instrumented code runs exactly as if it wasn't there.
+"""
+
+import atexit
+import json
+import os
+import time
+
+ENABLED = os.environ.get("HEROQUEST_PROFILE", "") not in ("", "0")
+PROFILE_FILE = os.environ.get("HEROQUEST_PROFILE_FILE", "heroquest_profile.jsonl")
+CPROFILE_TURNS = int(os.environ.get("HEROQUEST_CPROFILE", "0") or 0)
+CPROFILE_FILE = "heroquest.prof"
+
+# name -> [calls, total ns, max ns, {log2(us) bucket: calls}]
+_turn_stats = {}
+_total_stats = {}
+_turn = 0
+_profiler = None
+
+
+def _record(stats, name, elapsed):
+    entry = stats.get(name)
+    if entry is None:
+        entry = stats[name] = [0, 0, 0, {}]
+    entry[0] += 1
+    entry[1] += elapsed
+    if elapsed > entry[2]:
+        entry[2] = elapsed
+    # Bucket n holds calls that took under 2**n microseconds
+    bucket = (elapsed // 1000).bit_length()
+    entry[3][bucket] = entry[3].get(bucket, 0) + 1
+
+
+def timed(name):
+    """Decorator: counts and times calls under `name` when profiling is on."""
+
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+
+        def timed_fn(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                _record(_turn_stats, name, elapsed)
+                _record(_total_stats, name, elapsed)
+
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__qualname__ = fn.__qualname__
+        timed_fn.__doc__ = fn.__doc__
+        timed_fn.__wrapped__ = fn
+        return timed_fn
+
+    return wrap
+
+
+def _summary(stats):
+    return {
+        name: {
+            "calls": calls,
+            "total_ms": round(total / 1e6, 4),
+            "max_ms": round(worst / 1e6, 4),
+            "hist_us": {f"<{2 ** b}": n for b, n in sorted(hist.items())},
+        }
+        for name, (calls, total, worst, hist) in stats.items()
+    }
+
+
+def _write(line):
+    with open(PROFILE_FILE, "a") as f:
+        f.write(json.dumps(line) + "\n")
+
+
+def end_turn():
+    """Call once per game turn: writes that turn's summary and starts the next."""
+    global _turn, _profiler
+    if not ENABLED:
+        return
+    _turn += 1
+    if _turn_stats:
+        _write({"turn": _turn, "stats": _summary(_turn_stats)})
+        _turn_stats.clear()
+
+    if _profiler is not None and _turn >= CPROFILE_TURNS:
+        _profiler.disable()
+        _profiler.dump_stats(CPROFILE_FILE)
+        _profiler = None
+
+
+def _finish():
+    if _total_stats:
+        _write({"turn": "total", "stats": _summary(_total_stats)})
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(CPROFILE_FILE)
+
+
+if ENABLED:
+    atexit.register(_finish)
+    if CPROFILE_TURNS > 0:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+
+# ==========================================
+# NON-BLOCKING KEY INPUT
+# ==========================================
+# Single key presses delivered to asyncio code without waiting for Enter.
+# On POSIX the terminal goes into cbreak mode (no line buffering, no echo)
+# and stdin is watched by the event loop. On Windows msvcrt is polled.
+#
+# Arrow keys arrive as escape sequences (ESC [ A, or ESC O A in keypad
+# mode). They're read whole and come out as "up", "down", "right" or
+# "left"; any other sequence (F-keys, Home, ...) is dropped. ESC on its own
+# is a key.
+
+ARROWS = {"A": "up", "B": "down", "C": "right", "D": "left"}  # by final byte
+WINDOWS_ARROWS = {"H": "up", "P": "down", "M": "right", "K": "left"}  # after \x00 / \xe0
+
+
+class KeyReader:
+    """
+    async with KeyReader() as keys:
+        key = await keys.get()
+    """
+
+    POLL = 0.01  # seconds between msvcrt polls on Windows
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.queue = asyncio.Queue()
+        self._saved = None
+        self._poller = None
+        self._pending = ""  # start of an escape sequence split across reads
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        if os.name == "nt":
+            self._poller = asyncio.create_task(self._poll_windows())
+            return self
+
+        fd = self.stream.fileno()
+        if self.stream.isatty():
+            import termios
+            import tty
+
+            self._saved = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+        loop.add_reader(fd, self._on_readable, fd)
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._poller:
+            self._poller.cancel()
+            return
+        fd = self.stream.fileno()
+        asyncio.get_running_loop().remove_reader(fd)
+        if self._saved is not None:
+            import termios
+
+            termios.tcsetattr(fd, termios.TCSADRAIN, self._saved)
+
+    def _on_readable(self, fd):
+        data = os.read(fd, 64)
+        if not data:
+            self.queue.put_nowait(None)  # end of input (e.g. a piped script ran out)
+            asyncio.get_running_loop().remove_reader(fd)
+            return
+        for key in self._keys(data.decode(errors="ignore")):
+            self.queue.put_nowait(key)
+
+    def _keys(self, text):
+        """Splits what was read into keys, keeping escape sequences whole."""
+        text, self._pending = self._pending + text, ""
+        keys = []
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            i += 1
+            if ch != "\x1b" or i == len(text) or text[i] not in "[O":
+                keys.append(ch)  # includes a lone ESC at the end of a read
+                continue
+            # CSI (ESC [ params final) or SS3 (ESC O final); final is @ to ~
+            end = i + 1
+            while end < len(text) and not "@" <= text[end] <= "~":
+                end += 1
+            if end == len(text):
+                self._pending = text[i - 1 :]  # the rest is in the next read
+                break
+            move = ARROWS.get(text[end])
+            if move and (text[i] == "O" or end == i + 1):
+                keys.append(move)
+            i = end + 1
+        return keys
+
+    async def _poll_windows(self):
+        import msvcrt
+
+        while True:
+            while msvcrt.kbhit():
+                ch = msvcrt.getwch()
+                if ch in ("\x00", "\xe0"):  # arrow/function key: one more char
+                    move = WINDOWS_ARROWS.get(msvcrt.getwch())
+                    if move:
+                        self.queue.put_nowait(move)
+                    continue
+                self.queue.put_nowait(ch)
+            await asyncio.sleep(self.POLL)
+
+    async def get(self):
+        """Next key (a character or an arrow name), or None once input has closed."""
+        return await self.queue.get()
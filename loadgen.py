@@ -0,0 +1,129 @@
+"""
+Local load generator for server.py.
+
+    python loadgen.py --idle 2000 --active 50 --commands 200
+
+Starts a server subprocess on a temporary Unix socket (or uses --unix /
+--port to hit one that's already running), opens `idle` sessions that just
+sit there, then has `active` clients play random commands as fast as the
+server answers. Reports session setup rate, server memory per idle session
+(from /proc, Linux only), command throughput and latency percentiles.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COMMANDS = ["w", "a", "s", "d", "w", "a", "s", "d", "f", "e", "look", "c Genie", "c Tempest"]
+
+
+def rss_kb(pid):
+    """Resident memory of a process in KB, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def connect(args):
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix, limit=2**20)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port, limit=2**20)
+    await reader.readline()  # welcome reply
+    return reader, writer
+
+
+async def play(args, rnd, latencies):
+    reader, writer = await connect(args)
+    for _ in range(args.commands):
+        start = time.perf_counter()
+        writer.write(rnd.choice(COMMANDS).encode() + b"\n")
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if reply.get("over"):
+            # Hero died: start a fresh game and carry on
+            writer.close()
+            reader, writer = await connect(args)
+    writer.close()
+
+
+async def run(args, server_pid):
+    before = rss_kb(server_pid) if server_pid else None
+
+    start = time.perf_counter()
+    idle = []
+    for i in range(0, args.idle, 100):
+        idle += await asyncio.gather(*(connect(args) for _ in range(min(100, args.idle - i))))
+    elapsed = time.perf_counter() - start
+    print(f"opened {len(idle)} idle sessions in {elapsed:.2f}s ({len(idle) / max(elapsed, 1e-9):,.0f}/s)")
+
+    after = rss_kb(server_pid) if server_pid else None
+    if before is not None and after is not None and idle:
+        print(f"server RSS {before / 1024:.1f} MB -> {after / 1024:.1f} MB, {(after - before) / len(idle):.1f} KB per idle session")
+
+    latencies = []
+    rnd = random.Random(args.seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(play(args, random.Random(rnd.random()), latencies) for _ in range(args.active)))
+    elapsed = time.perf_counter() - start
+    if latencies:
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(
+            f"{len(latencies)} commands from {args.active} clients in {elapsed:.2f}s: "
+            f"{len(latencies) / elapsed:,.0f} commands/s, p50 {p50:.2f} ms, p99 {p99:.2f} ms"
+        )
+
+    for _, writer in idle:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for server.py")
+    parser.add_argument("--idle", type=int, default=1000, help="sessions opened and left idle")
+    parser.add_argument("--active", type=int, default=50, help="clients sending commands")
+    parser.add_argument("--commands", type=int, default=200, help="commands per active client")
+    parser.add_argument("--unix", help="connect to a running server on this socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="connect to a running server on this port")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Every idle session is a socket on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    server = None
+    if not args.unix and args.port is None:
+        args.unix = os.path.join(tempfile.mkdtemp(), "heroquest.sock")
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, "server.py"), "--unix", args.unix, "--seed", str(args.seed)],
+            stdout=subprocess.PIPE,
+            text=True,
+            preexec_fn=lambda: resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard)),
+        )
+        server.stdout.readline()  # "Serving HeroQuest on ..." once it's listening
+    try:
+        asyncio.run(run(args, server.pid if server else None))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
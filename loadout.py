@@ -0,0 +1,179 @@
+"""
+Loadout optimizer.
+
+For a hero class and a gold budget, lists every legal way to fill the
+weapon, head, body and off-hand slots from GAME_DATA["weapons"] and
+GAME_DATA["armour"], drops the ones another loadout beats on every count
+(cost, attack dice, defence dice, move penalty, reach), and scores the rest
+with odds.py against a monster mix: the expected body points the hero loses
+per monster killed, striking first. Scoring is farmed out to a process pool.
+
+    python loadout.py Barbarian 600 --mix Goblin:3,Orc:2,"Chaos Warrior":1
+"""
+
+import argparse
+import time
+from itertools import product
+from multiprocessing import Pool
+
+import odds
+from data import GAME_DATA
+
+SLOTS = ("head", "body", "off_hand")
+
+
+# --- 1. ENUMERATION ---
+
+
+def _allowed(hero_class, item):
+    return hero_class != "Wizard" or item.get("wizard_ok", True)
+
+
+def loadouts(hero_class, budget):
+    """
+    Every legal (weapon, head, body, off_hand) name tuple within budget.
+    Empty slots hold "Empty"; shields can't go with two-handed weapons.
+    """
+    weapons = [name for name, w in GAME_DATA["weapons"].items() if _allowed(hero_class, w)]
+    by_slot = {slot: ["Empty"] for slot in SLOTS}
+    for name, armour in GAME_DATA["armour"].items():
+        if armour.get("slot") in by_slot and _allowed(hero_class, armour):
+            by_slot[armour["slot"]].append(name)
+
+    found = []
+    for weapon, head, body, off_hand in product(weapons, *(by_slot[s] for s in SLOTS)):
+        if GAME_DATA["weapons"][weapon].get("two_handed") and off_hand != "Empty":
+            continue
+        if cost((weapon, head, body, off_hand)) <= budget:
+            found.append((weapon, head, body, off_hand))
+    return found
+
+
+def cost(loadout):
+    weapon, *armour = loadout
+    return GAME_DATA["weapons"][weapon]["cost"] + sum(GAME_DATA["armour"][a]["cost"] for a in armour)
+
+
+def stats(hero_class, loadout):
+    """(attack dice, defence dice, move penalty, diagonal, thrown), as Hero._derive_stats works them out."""
+    hero = GAME_DATA["heroes"][hero_class]
+    weapon = GAME_DATA["weapons"][loadout[0]]
+    armour = [GAME_DATA["armour"][a] for a in loadout[1:]]
+    return (
+        hero["attack"] + weapon["attack_bonus"],
+        hero["defend"] + sum(a["defence_bonus"] for a in armour),
+        sum(a.get("move_penalty", 0) for a in armour),
+        weapon.get("diagonal", False),
+        weapon.get("thrown", False),
+    )
+
+
+# --- 2. PRUNING ---
+
+
+def _key(hero_class, loadout):
+    """Bigger is better on every component."""
+    attack, defence, penalty, diagonal, thrown = stats(hero_class, loadout)
+    return (-cost(loadout), attack, defence, -penalty, diagonal, thrown)
+
+
+def prune(hero_class, candidates):
+    """Drops every loadout that some other one matches or beats on every count."""
+    keyed = sorted(((_key(hero_class, c), c) for c in candidates), reverse=True)
+    kept = []
+    for key, loadout in keyed:
+        # Sorted best-first, so anything dominating `key` is already in kept
+        if not any(all(k >= o for k, o in zip(other, key)) for other, _ in kept):
+            kept.append((key, loadout))
+    return [loadout for _, loadout in kept]
+
+
+# --- 3. SCORING ---
+
+
+def rounds_to_kill(dist, hp):
+    """Expected attacks to deal `hp` damage with per-attack damage distribution `dist`."""
+    miss = dist[0]
+    if miss >= 1.0:
+        return float("inf")
+    rounds = [0.0] * (hp + 1)
+    for h in range(1, hp + 1):
+        rest = sum(p * rounds[max(0, h - d)] for d, p in enumerate(dist) if d)
+        rounds[h] = (1 + rest) / (1 - miss)
+    return rounds[hp]
+
+
+def score(hero_class, loadout, mix):
+    """Expected body points lost per monster killed, averaged over mix {name: weight}."""
+    attack, defence = stats(hero_class, loadout)[:2]
+    total = weight_sum = 0.0
+    for name, weight in mix.items():
+        monster = GAME_DATA["monsters"][name]
+        rounds = rounds_to_kill(odds.damage_distribution(attack, monster["defend"], "black_shields"), monster["hp"])
+        taken = odds.expected_damage(monster["attack"], defence, "white_shields")
+        # The hero strikes first, so the monster gets one attack fewer
+        total += weight * taken * max(0.0, rounds - 1)
+        weight_sum += weight
+    return total / weight_sum
+
+
+def score_chunk(job):
+    """Worker entry point. job = (hero class, [loadouts], mix)."""
+    hero_class, chunk, mix = job
+    return [(score(hero_class, loadout, mix), cost(loadout), loadout) for loadout in chunk]
+
+
+def optimize(hero_class, budget, mix, workers=None, chunk=16):
+    """
+    Best loadouts first: [(hp lost per kill, cost, (weapon, head, body, off_hand))].
+    Only loadouts that aren't dominated are scored.
+    """
+    if hero_class not in GAME_DATA["heroes"]:
+        raise ValueError(f"Unknown hero class '{hero_class}'")
+    for name in mix:
+        if name not in GAME_DATA["monsters"]:
+            raise ValueError(f"Unknown monster '{name}'")
+
+    candidates = prune(hero_class, loadouts(hero_class, budget))
+    # Fill the odds table (and its file) once, so workers only read it
+    odds.precompute()
+    jobs = [(hero_class, candidates[i : i + chunk], mix) for i in range(0, len(candidates), chunk)]
+    if workers == 1 or len(jobs) <= 1:
+        scored = [row for job in jobs for row in score_chunk(job)]
+    else:
+        with Pool(workers) as pool:
+            scored = [row for part in pool.imap_unordered(score_chunk, jobs) for row in part]
+    return sorted(scored)
+
+
+def parse_mix(text):
+    """Turns "Goblin:3,Orc:1" into {"Goblin": 3.0, "Orc": 1.0}; weights default to 1."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition(":")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Best equipment for a hero and a gold budget")
+    parser.add_argument("hero_class", choices=list(GAME_DATA["heroes"]))
+    parser.add_argument("budget", type=int)
+    parser.add_argument("--mix", type=parse_mix, default=None, help='e.g. "Goblin:3,Orc:1" (default: every monster)')
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    mix = args.mix or {name: 1.0 for name in GAME_DATA["monsters"]}
+    start = time.perf_counter()
+    ranked = optimize(args.hero_class, args.budget, mix, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for lost, gold, (weapon, head, body, off_hand) in ranked[: args.top]:
+        penalty = stats(args.hero_class, (weapon, head, body, off_hand))[2]
+        print(f"{lost:6.3f} HP/kill  {gold:5} gold  move -{penalty}  {weapon} | {head} | {body} | {off_hand}")
+    print(f"{len(ranked)} undominated loadouts scored in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
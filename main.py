@@ -1,51 +1,303 @@
-from models import spawn_hero, spawn_monster
-from map import Map
+import argparse
+import asyncio
+import contextlib
+import io
 import time
 
+import instrument
+from keyboard import KeyReader
+from map import Map
+from models import spawn_hero, spawn_monster
+from pathfinding import path_to_attack
+from quest import Quest
+from rng import GameRNG, ReplayFinished, ReplayRNG
+from sight import line_of_sight
+from spells import registry
+from turns import ZARGON, TurnScheduler, zargon_phase
+
+DIRECTIONS = {
+    "w": (0, -1), "s": (0, 1), "a": (-1, 0), "d": (1, 0),
+    "up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0),  # arrow keys
+}
+
+FPS = 30  # frame cap for the render loop
+MESSAGE_SECONDS = 2  # how long a message stays on screen
+REPLAY_FILE = "heroquest_main_replay.json"  # seed, rolls and keys of the last game
+
+
+class GameState:
+    """Everything the render loop needs to draw a frame."""
+
+    def __init__(self, game_map, player, monsters, quest=None, rng=None):
+        self.game_map = game_map
+        self.rng = rng if rng is not None else GameRNG()  # every roll in this game goes through it
+        self.quest = quest  # rooms load as the player walks into them
+        self.player = player
+        self.heroes = [player]
+        self.monsters = monsters
+        self.turns = TurnScheduler(self.heroes)
+        self.attacked = False  # one attack per hero turn
+        self.messages = []  # (text, time it disappears)
+        self.prompt = None  # spell name being typed, or None
+        self.running = True
+        self.dirty = True
+
+    def say(self, text, seconds=MESSAGE_SECONDS):
+        """Shows a message for a while instead of sleeping so it can be read."""
+        self.messages.append((text, time.monotonic() + seconds))
+        self.dirty = True
+
+    def expire_messages(self):
+        now = time.monotonic()
+        live = [m for m in self.messages if m[1] > now]
+        if len(live) != len(self.messages):
+            self.messages = live
+            self.dirty = True
+
+    def footer(self):
+        player = self.player
+        lines = [
+            "",
+            f"--- {player.name}'s Turn ---",
+            f"HP: {player.hp} | MP: {player.mp} | Moves left: {player.movement_remaining} | Gold: {player.gold}",
+            f"Spells: {player.spell_names()}",
+            "",
+        ]
+        lines += [text for text, _ in self.messages]
+        if self.prompt is not None:
+            lines.append(f"Enter spell name: {self.prompt}_")
+        else:
+            lines.append(
+                "Command (w/a/s/d or arrows to move, 'g' to close in, 'f' to fight, "
+                "'c' to cast, 'e' to end turn, 'q' to quit)"
+            )
+        return lines
+
+    def next_turn(self):
+        """Runs Zargon's phase if it's up, then starts the next hero turn."""
+        instrument.end_turn()
+        while self.player.hp > 0:
+            phase, actor = self.turns.next_turn()
+            if actor == ZARGON:
+                _, printed = capture(zargon_phase, self.game_map, self.heroes, self.monsters, self.rng)
+                for line in printed:
+                    self.say(line)
+                continue
+            self.attacked = False
+            _, printed = capture(actor.roll_for_movement, self.rng)
+            for line in printed:
+                self.say(line)
+            return
+        self.say(f"{self.player.name} has fallen. Press 'q' to quit.", 3600)
+
+
+def capture(fn, *args):
+    """Runs fn and returns (result, lines it printed) so they can go in the HUD."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = fn(*args)
+    return result, [line for line in out.getvalue().splitlines() if line.strip()]
+
+
+def nearest_in_sight(game_map, viewer, monsters):
+    """Closest living monster the viewer can see (spell target), or None."""
+    seen = [m for m in monsters if m.hp > 0 and line_of_sight(game_map, viewer, m)]
+    return min(seen, key=lambda m: abs(m.x - viewer.x) + abs(m.y - viewer.y), default=None)
+
 
-def start_game():
-    # 1. Setup Map
-    game_map = Map()
+def remove_dead(state):
+    for monster in [m for m in state.monsters if m.hp <= 0]:
+        state.game_map.remove(monster)
+        state.monsters.remove(monster)
+
+
+def arrive(state):
+    """A step has been taken: pays for it and lets the quest react to the square."""
+    player = state.player
+    player.movement_remaining -= 1
+    if state.quest is not None:
+        _, printed = capture(state.quest.enter, player.x, player.y)
+        _, more = capture(state.quest.step_on, player)
+        for line in printed + more:
+            state.say(line)
+
+
+def go_to_nearest(state):
+    """Walks the hero towards the nearest monster in sight, as far as this turn's moves go."""
+    player, game_map = state.player, state.game_map
+    target = nearest_in_sight(game_map, player, state.monsters)
+    path = path_to_attack(game_map, player, target) if target is not None else None
+    if target is None:
+        state.say("No monster in sight.", 1)
+    elif path is None:
+        state.say(f"No way through to the {target.char_class}.", 1)
+    elif not path:
+        state.say(f"The {target.char_class} is within reach ('f' to fight).", 1)
+    elif player.movement_remaining <= 0:
+        state.say("No movement left this turn ('e' to end turn).", 1)
+    else:
+        steps = 0
+        for x, y in path[: player.movement_remaining]:
+            if not game_map.move(player, x - player.x, y - player.y):
+                break  # a room opened up and something stands in the way
+            arrive(state)
+            steps += 1
+        if steps < len(path):
+            state.say(f"The {target.char_class} is {len(path) - steps} more squares away.", 1)
+
+
+def handle_key(state, key):
+    player, game_map = state.player, state.game_map
+    if player.hp <= 0 and key.lower() != "q":
+        return
+
+    # Typing a spell name: keys build up the prompt until Enter
+    if state.prompt is not None:
+        if key in ("\r", "\n"):
+            spell_name, state.prompt = state.prompt, None
+            target = None
+            if registry().aimed(spell_name):
+                target = nearest_in_sight(game_map, player, state.monsters)
+            _, printed = capture(player.cast_spell, spell_name, target, game_map, state.rng)
+            for line in printed:
+                state.say(line)
+            remove_dead(state)
+        elif key in ("\x7f", "\b"):
+            state.prompt = state.prompt[:-1]
+        elif key == "\x1b":
+            state.prompt = None
+        elif len(key) == 1 and key.isprintable():
+            state.prompt += key
+        return
+
+    cmd = key.lower()
+    if cmd == "q":
+        state.running = False
+    elif cmd in DIRECTIONS:
+        # Movement goes through the map so walls of the board and
+        # occupied squares are respected
+        dx, dy = DIRECTIONS[cmd]
+        if player.movement_remaining <= 0:
+            state.say("No movement left this turn ('e' to end turn).", 1)
+        elif game_map.open_door(player.x + dx, player.y + dy):
+            state.say("The door creaks open.", 1)
+        elif not game_map.move(player, dx, dy):
+            state.say("You can't move there!", 1)
+        else:
+            arrive(state)
+    elif cmd == "g":
+        go_to_nearest(state)
+    elif cmd == "f":
+        targets = [e for e in game_map.adjacent_entities(player) if e in state.monsters]
+        if state.attacked:
+            state.say("You have already attacked this turn.", 1)
+        elif not targets:
+            state.say("Nothing to attack here.", 1)
+        else:
+            state.attacked = True
+            _, printed = capture(player.perform_attack, targets[0], state.rng)
+            for line in printed:
+                state.say(line)
+            remove_dead(state)
+    elif cmd == "e":
+        player.movement_remaining = 0
+        state.next_turn()
+    elif cmd == "c":
+        state.prompt = ""
+
+
+async def render_loop(state):
+    """Redraws at most FPS times a second, and only when something changed."""
+    frame_time = 1 / FPS
+    while state.running:
+        state.expire_messages()
+        if state.dirty:
+            state.dirty = False
+            state.game_map.render(state.footer(), focus=state.player)
+        await asyncio.sleep(frame_time)
+
+
+async def input_loop(state, keys):
+    while state.running:
+        key = await keys.get()
+        if key is None:
+            state.running = False
+            break
+        state.rng.command(key)  # logged so replay() can press it again
+        handle_key(state, key)
+        state.dirty = True
+
+
+def new_game(quest_path=None, rng=None):
+    """
+    Builds a fresh GameState: map, hero and monsters, before the first turn.
+    Every roll in the game comes from `rng` (a new GameRNG by default).
+    """
+    # 1. Setup Map: from a quest file, or the empty test board
+    quest = Quest(quest_path) if quest_path else None
+    game_map = quest.game_map if quest else Map()
+    x, y = quest.start() if quest else (1, 1)
 
     # 2. Spawn your Hero (The Wizard needs his spells!)
-    # We'll put him at x=1, y=1
     player = spawn_hero(
-        "Gandalf", "Wizard", x=1, y=1, chosen_spells=["Fire", "Earth", "Air"]
+        "Gandalf", "Wizard", x=x, y=y, chosen_spells=["Fire", "Earth", "Air"]
     )
+    game_map.place(player)
 
-    # 3. Spawn a test monster at x=5, y=5
-    goblin = spawn_monster("Goblin", x=5, y=5)
+    # 3. Monsters: the quest spawns each room's as it's entered; the test
+    # board just gets a goblin at x=5, y=5
+    if quest:
+        monsters = quest.monsters
+    else:
+        monsters = [spawn_monster("Goblin", x=5, y=5)]
+        game_map.place(monsters[0])
 
-    heroes = [player]
-    monsters = [goblin]
+    return GameState(game_map, player, monsters, quest, rng)
 
-    # 4. THE MAIN LOOP
-    while True:
-        game_map.render(heroes, monsters)
 
-        print(f"\n--- {player.name}'s Turn ---")
-        print(f"HP: {player.hp} | MP: {player.mp}")
-        print(f"Spells: {[s['name'] for s in player.spells]}")
+async def start_game(quest_path=None, seed=None):
+    # One logged RNG for the whole game, saved on the way out for replay()
+    rng = GameRNG(seed)
+    quest_path = rng.external("quest", lambda: quest_path)
+    state = new_game(quest_path, rng)
+    try:
+        state.next_turn()
 
-        cmd = input("\nCommand (w/a/s/d to move, 'c' to cast, 'q' to quit): ").lower()
+        # THE MAIN LOOP: input and rendering run side by side
+        async with KeyReader() as keys:
+            renderer = asyncio.create_task(render_loop(state))
+            await input_loop(state, keys)
+            await renderer
+    finally:
+        rng.save(REPLAY_FILE)
 
-        if cmd == "q":
-            break
-        elif cmd in ["w", "a", "s", "d"]:
-            # Basic movement logic
-            if cmd == "w":
-                player.y -= 1
-            if cmd == "s":
-                player.y += 1
-            if cmd == "a":
-                player.x -= 1
-            if cmd == "d":
-                player.x += 1
-        elif cmd == "c":
-            spell_name = input("Enter spell name: ")
-            player.cast_spell(spell_name)
-            time.sleep(2)  # Pause so you can see the message
+
+def replay(path=REPLAY_FILE):
+    """
+    Re-runs a logged game with no terminal: same quest, same seed, the
+    same keys in the same order. Returns the final GameState. Raises
+    rng.ReplayDiverged if any roll doesn't line up with the log.
+    """
+    rng = ReplayRNG.from_file(path)
+    state, _ = capture(new_game, rng.external("quest", lambda: None), rng)
+    state.next_turn()
+    try:
+        while state.running:
+            handle_key(state, rng.ask())
+    except ReplayFinished:
+        pass
+    return state
 
 
 if __name__ == "__main__":
-    start_game()
+    parser = argparse.ArgumentParser(description="HeroQuest in the terminal")
+    parser.add_argument("quest", nargs="?", help="quest file, e.g. quests/the_trial.quest")
+    parser.add_argument("--seed", type=int, help="seed for every roll (default: a random one)")
+    parser.add_argument("--replay", metavar="LOG", help=f"re-run a logged game, e.g. {REPLAY_FILE}")
+    args = parser.parse_args()
+    if args.replay:
+        state = replay(args.replay)
+        player = state.player
+        print(f"Replay OK: {player.name} at ({player.x}, {player.y}), HP {player.hp}, Gold {player.gold}")
+    else:
+        asyncio.run(start_game(args.quest, args.seed))
@@ -1,48 +1,297 @@
-import os
+import json
+import mmap
+
+from instrument import timed
+from screen import TERMINAL
+
+# Tile codes, one byte per square in Map.tiles
+FLOOR = 0
+WALL = 1
+DOOR = 2  # closed: blocks movement and sight
+OPEN_DOOR = 3
+
+WALKABLE = (FLOOR, OPEN_DOOR)
+GLYPHS = {FLOOR: " . ", WALL: "###", DOOR: " + ", OPEN_DOOR: " / "}
+
+# Largest area drawn at once; bigger maps scroll around the focus
+VIEW_WIDTH = 26
+VIEW_HEIGHT = 19
+
+# How far sight reaches by default on maps bigger than the standard board:
+# far enough to see across the viewport, near enough that a sight row never
+# has to look at the whole map
+SIGHT_RADIUS = max(VIEW_WIDTH, VIEW_HEIGHT) // 2
 
 
 class Map:
-    def __init__(self, width=26, height=19):
+    def __init__(self, width=26, height=19, fill=FLOOR, tiles=None, sight_radius=None):
         """
         Initializes the board dimensions.
         Standard HeroQuest (UK Edition) is 26x19.
+
+        Big dungeons start as solid rock (fill=WALL) and have rooms and
+        corridors carved out, or load their tiles from disk (Map.load).
         """
         self.width = width
         self.height = height
+        # Tile layer: one byte per square, row by row (index y * width + x)
+        if tiles is None:
+            tiles = bytearray(width * height) if fill == FLOOR else bytearray([fill]) * (width * height)
+        self.tiles = tiles
+        # Occupancy index: (x, y) -> entity standing there
+        self.occupants = {}
+        # Bumped on every occupancy change
+        self.version = 0
+        # Cached pathfinding.distance_field results. They only depend on the
+        # walls, so they last until the layout changes.
+        self.distance_fields = {}
+        # Bumped whenever a tile changes, so sight tables are rebuilt
+        self.layout_version = 0
+        # Optional fog of war (see sight.FogOfWar); None shows the whole board
+        self.fog = None
+        # How far line of sight reaches. None means the whole board on maps
+        # up to the standard size and SIGHT_RADIUS on bigger ones (see
+        # sight_reach).
+        self.sight_radius = sight_radius
+
+    # ------------------
+    # Tiles
+    # ------------------
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def tile(self, x, y):
+        return self.tiles[y * self.width + x]
+
+    def set_tile(self, x, y, tile):
+        self.tiles[y * self.width + x] = tile
+        self._layout_changed()
+
+    def set_wall(self, x, y, wall=True):
+        """Adds or knocks down a wall. Any cached sight tables are rebuilt."""
+        self.set_tile(x, y, WALL if wall else FLOOR)
+
+    def sight_reach(self):
+        """sight_radius, or the default for this size of map (None = the whole board)."""
+        if self.sight_radius is None and self.width * self.height > VIEW_WIDTH * VIEW_HEIGHT:
+            return SIGHT_RADIUS
+        return self.sight_radius
+
+    def is_walkable(self, x, y):
+        """In bounds and not a wall or closed door (figures aren't checked)."""
+        return self.in_bounds(x, y) and self.tiles[y * self.width + x] in WALKABLE
+
+    def blocks_sight(self, x, y):
+        return self.tiles[y * self.width + x] not in WALKABLE
+
+    def is_open_plan(self):
+        """True when nothing on the map blocks sight (the plain board)."""
+        return self.tiles.find(bytes([WALL])) == -1 and self.tiles.find(bytes([DOOR])) == -1
+
+    def carve_room(self, x, y, width, height):
+        """Floor rectangle with a wall all the way round (the walls sit outside it)."""
+        for ry in range(max(0, y - 1), min(self.height, y + height + 1)):
+            row = ry * self.width
+            for rx in range(max(0, x - 1), min(self.width, x + width + 1)):
+                inside = x <= rx < x + width and y <= ry < y + height
+                if inside:
+                    self.tiles[row + rx] = FLOOR
+                elif self.tiles[row + rx] not in (FLOOR, DOOR, OPEN_DOOR):
+                    # Neighbouring floor and doorways are kept
+                    self.tiles[row + rx] = WALL
+        self._layout_changed()
+
+    def carve_corridor(self, x0, y0, x1, y1):
+        """One-square-wide L-shaped corridor: along x first, then along y."""
+        step = 1 if x1 >= x0 else -1
+        for x in range(x0, x1 + step, step):
+            self.tiles[y0 * self.width + x] = FLOOR
+        step = 1 if y1 >= y0 else -1
+        for y in range(y0, y1 + step, step):
+            self.tiles[y * self.width + x1] = FLOOR
+        self._layout_changed()
+
+    def add_door(self, x, y, is_open=False):
+        self.set_tile(x, y, OPEN_DOOR if is_open else DOOR)
+
+    def open_door(self, x, y):
+        if self.tile(x, y) == DOOR:
+            self.set_tile(x, y, OPEN_DOOR)
+            return True
+        return False
+
+    # ------------------
+    # Disk (memory-mapped tiles)
+    # ------------------
+
+    def save(self, path):
+        """Writes path.tiles (raw tile bytes) and path.json (dimensions)."""
+        with open(path + ".tiles", "wb") as f:
+            f.write(self.tiles)
+        with open(path + ".json", "w") as f:
+            json.dump({"width": self.width, "height": self.height}, f)
+
+    @classmethod
+    def load(cls, path, sight_radius=None):
+        """
+        Opens a saved map with its tiles memory-mapped, so a 1000x1000
+        dungeon costs almost nothing until squares are actually touched.
+        Tile edits write straight through to the file.
+        """
+        with open(path + ".json", "r") as f:
+            meta = json.load(f)
+        with open(path + ".tiles", "r+b") as f:
+            tiles = mmap.mmap(f.fileno(), 0)
+        return cls(meta["width"], meta["height"], tiles=tiles, sight_radius=sight_radius)
+
+    # ------------------
+    # Occupancy
+    # ------------------
+
+    def occupant_at(self, x, y):
+        return self.occupants.get((x, y))
+
+    def is_free(self, x, y):
+        return self.is_walkable(x, y) and (x, y) not in self.occupants
+
+    def place(self, entity):
+        """Adds a freshly spawned entity to the board at its own x/y."""
+        if entity is None:
+            return False
+        if not self.is_free(entity.x, entity.y):
+            print(f"!!! Cannot place {entity.char_class} at ({entity.x}, {entity.y}) !!!")
+            return False
+        self.occupants[(entity.x, entity.y)] = entity
+        self._changed()
+        return True
+
+    def _changed(self):
+        self.version += 1
+
+    def _layout_changed(self):
+        self.layout_version += 1
+        self.distance_fields.clear()
+        self._changed()
+
+    def remove(self, entity):
+        """Takes an entity (e.g. a slain monster) off the board."""
+        if self.occupants.get((entity.x, entity.y)) is entity:
+            del self.occupants[(entity.x, entity.y)]
+            self._changed()
+
+    @timed("movement")
+    def move(self, entity, dx, dy):
+        """Steps an entity by (dx, dy). Returns False if blocked or off the board."""
+        nx, ny = entity.x + dx, entity.y + dy
+        if not self.is_free(nx, ny):
+            return False
+        del self.occupants[(entity.x, entity.y)]
+        entity.x, entity.y = nx, ny
+        self.occupants[(nx, ny)] = entity
+        self._changed()
+        return True
+
+    def relocate(self, moves):
+        """
+        Moves many entities at once, e.g. the whole horde: moves is a list
+        of (entity, x, y). Squares being left are free for the others to
+        take, so figures can follow each other or swap. An entity whose new
+        square is taken stays where it was. Returns those entities.
+        """
+        for entity, _, _ in moves:
+            if self.occupants.get((entity.x, entity.y)) is entity:
+                del self.occupants[(entity.x, entity.y)]
+        staying, pending = [], moves
+        while True:
+            kept = {(e.x, e.y) for e in staying}
+            claimed, going, blocked = set(), [], []
+            for entity, x, y in pending:
+                if (x, y) in kept or (x, y) in claimed or not self.is_free(x, y):
+                    blocked.append(entity)
+                else:
+                    claimed.add((x, y))
+                    going.append((entity, x, y))
+            if not blocked:
+                break
+            # Their old squares are off limits now too, so check again
+            staying += blocked
+            pending = going
+
+        for entity in staying:
+            self.occupants[(entity.x, entity.y)] = entity
+        for entity, x, y in pending:
+            entity.x, entity.y = x, y
+            self.occupants[(x, y)] = entity
+        self._changed()
+        return staying
+
+    def adjacent_entities(self, entity):
+        """Everything entity could attack from where it stands (see Entity.is_adjacent)."""
+        found = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                other = self.occupants.get((entity.x + dx, entity.y + dy))
+                if other is not None and other is not entity and entity.is_adjacent(other):
+                    found.append(other)
+        return found
+
+    # ------------------
+    # Drawing
+    # ------------------
 
-    def render(self, heroes, monsters):
+    def viewport(self, focus=None):
+        """(x0, y0, width, height) of the window to draw, kept centred on focus."""
+        view_w = min(self.width, VIEW_WIDTH)
+        view_h = min(self.height, VIEW_HEIGHT)
+        if focus is None:
+            return 0, 0, view_w, view_h
+        x0 = min(max(0, focus.x - view_w // 2), self.width - view_w)
+        y0 = min(max(0, focus.y - view_h // 2), self.height - view_h)
+        return x0, y0, view_w, view_h
+
+    def frame_lines(self, focus=None):
         """
-        Clears the terminal and draws the grid, heroes, and monsters.
+        The visible part of the board as text lines: column headers then one
+        line per row. Only the viewport's squares are looked at, so the cost
+        doesn't grow with the size of the map.
         """
-        # Clear the terminal for a TUI feel
-        # 'cls' for Windows, 'clear' for POSIX (Linux/Mac)
-        os.system("cls" if os.name == "nt" else "clear")
+        x0, y0, view_w, view_h = self.viewport(focus)
+        label = max(2, len(str(self.height - 1)))
+        columns = range(x0, x0 + view_w)
 
-        # 1. Print Column Headers (00, 01, 02...)
-        header = "   " + "".join([f"{x:02} " for x in range(self.width)])
-        print(header)
+        # 1. Column Headers (00, 01, 02...); last two digits on wide maps
+        lines = [" " * (label + 1) + "".join([f"{x % 100:02} " for x in columns])]
 
         # 2. Iterate through each row (y-axis)
-        for y in range(self.height):
-            # Print Row Header (00, 01, 02...)
-            line = f"{y:02} "
+        for y in range(y0, y0 + view_h):
+            # Row Header (00, 01, 02...)
+            line = f"{y:0{label}} "
+            row = y * self.width
 
             # 3. Iterate through each column (x-axis)
-            for x in range(self.width):
-                # Check if a hero is standing at this coordinate
-                occupant = next((h for h in heroes if h.x == x and h.y == y), None)
-
-                # If no hero, check if a monster is at this coordinate
-                if not occupant:
-                    occupant = next(
-                        (m for m in monsters if m.x == x and m.y == y), None
-                    )
+            for x in columns:
+                occupant = self.occupants.get((x, y))
 
-                if occupant:
+                if self.fog is not None and not self.fog.is_explored(x, y):
+                    # Never seen: leave it dark
+                    line += "   "
+                elif occupant and (self.fog is None or self.fog.is_visible(x, y)):
                     # Draw the first letter of the character class (e.g., 'W', 'G')
                     line += f" {occupant.char_class[0]} "
                 else:
-                    # Draw an empty floor tile
-                    line += " . "
+                    # Floor, wall or door
+                    line += GLYPHS[self.tiles[row + x]]
+
+            lines.append(line)
+        return lines
 
-            print(line)
+    @timed("render")
+    def render(self, footer=(), screen=TERMINAL, focus=None):
+        """
+        Draws the grid, heroes, and monsters plus any footer lines (the HUD).
+        Maps bigger than the view scroll to keep `focus` (the active hero)
+        in the middle. Only cells that changed since the last frame are sent
+        to the terminal; an offscreen Screen returns the frame as a string.
+        """
+        return screen.present(self.frame_lines(focus) + list(footer))
@@ -1,5 +1,7 @@
 import random
+import rules
 from data import GAME_DATA
+from instrument import timed
 
 # ==========================================
 # 1. BASE CLASSES
@@ -7,24 +9,55 @@ from data import GAME_DATA
 
 
 class Dice:
+    # Chance of each face on a combat die: skull, white shield, black shield
+    FACE_ODDS = (3 / 6, 2 / 6, 1 / 6)
 
     @staticmethod
-    def combat(num_dice):
-        results = {"skulls": 0, "white_shields": 0, "black_shields": 0}
-        for _ in range(num_dice):
-            roll = random.randint(1, 6)
-            if roll <= 3:  # 1, 2, 3 (50% Skull)
-                results["skulls"] += 1
-            elif roll <= 5:  # 4, 5 (33% White Shield)
-                results["white_shields"] += 1
-            else:  # 6 (16% Black Shield)
-                results["black_shields"] += 1
-        return results
+    def combat(num_dice, rng=random):
+        return rules.combat_dice(num_dice, rng)
+
+    @staticmethod
+    def combat_batch(num_dice, trials, exact=True, rng=None):
+        """Rolls num_dice combat dice `trials` times in one NumPy call.
+
+        Returns the same keys as combat(), each holding an int array of
+        length `trials`. exact=True draws the face counts straight from
+        the multinomial (3/6 skull, 2/6 white, 1/6 black); exact=False
+        rolls every d6 and buckets it like the per-die loop does.
+        """
+        import numpy as np  # only the batch path needs NumPy
+
+        rng = rng if rng is not None else np.random.default_rng()
+        if exact:
+            counts = rng.multinomial(num_dice, Dice.FACE_ODDS, size=trials)
+            skulls, white, black = counts[:, 0], counts[:, 1], counts[:, 2]
+        else:
+            rolls = rng.integers(1, 7, size=(trials, num_dice))
+            skulls = np.count_nonzero(rolls <= 3, axis=1)
+            black = np.count_nonzero(rolls == 6, axis=1)
+            white = num_dice - skulls - black
+        return {"skulls": skulls, "white_shields": white, "black_shields": black}
 
 
 class Entity:
     """Base class for all PCs & NPCs"""
 
+    # Fixed attribute layout: no per-instance __dict__, so large monster
+    # counts stay small in memory
+    __slots__ = (
+        "char_class",
+        "base_movement",
+        "base_attack",
+        "base_defend",
+        "hp",
+        "mp",
+        "x",
+        "y",
+        "movement_remaining",
+        "defence_key",
+        "held",
+    )
+
     def __init__(self, char_class, movement, attack, defend, hp, mp, x=0, y=0):
         self.char_class = char_class
         self.base_movement = movement
@@ -36,6 +69,8 @@ class Entity:
         self.y = y
         self.movement_remaining = 0
         self.defence_key = "white_shields"
+        # Turns left under a Sleep/Tempest style spell (skips them)
+        self.held = 0
 
     def calculate_attack_dice(self):
         return self.base_attack
@@ -43,36 +78,27 @@ class Entity:
     def calculate_defence_dice(self):
         return self.base_defend
 
-    def take_damage(self, amount):
-        self.hp = max(0, self.hp - amount)
-        print(f"{self.char_class} takes {amount} damage! HP is now {self.hp}")
-        if self.hp == 0:
-            print(f"!!! {self.char_class} has been slain!!!")
+    def take_damage(self, amount, sink=None):
+        self.hp, events = rules.damage(self.char_class, self.hp, amount)
+        rules.emit(events, sink)
         return self.hp > 0
 
-    def perform_attack(self, target):
+    @timed("combat")
+    def perform_attack(self, target, rng=random, sink=None):
+        """Rolls one attack (see rules.attack). Returns the events it produced."""
         if not self.is_adjacent(target):
-            print(f"!!! {target.char_class} is too far away to attack! !!!")
-            return
-
-        attack_dice = self.calculate_attack_dice()
-        attack_results = Dice.combat(attack_dice)
-        skulls = attack_results["skulls"]
-
-        defend_dice = target.calculate_defence_dice()
-        defend_results = Dice.combat(defend_dice)
-        blocks = defend_results.get(target.defence_key, 0)
-
-        damage = max(0, skulls - blocks)
-        print(f"\n--- Combat: {self.char_class} vs {target.char_class} ---")
-        print(
-            f"Attacker: {skulls} Skulls | Defender: {blocks} {target.defence_key.replace('_',' ').title()}"
+            return rules.emit(rules.out_of_reach(self.char_class, target.char_class), sink)
+
+        target.hp, events = rules.attack(
+            self.char_class,
+            target.char_class,
+            self.calculate_attack_dice(),
+            target.calculate_defence_dice(),
+            target.defence_key,
+            target.hp,
+            rng,
         )
-
-        if damage > 0:
-            target.take_damage(damage)
-        else:
-            print("The attack was completely blocked!")
+        return rules.emit(events, sink)
 
     def is_adjacent(self, target):
         dx, dy = abs(self.x - target.x), abs(self.y - target.y)
@@ -82,20 +108,74 @@ class Entity:
         return (dx + dy) == 1
 
 
+@timed("combat")
+def resolve_attacks(pairs, rng=None, sink=None):
+    """
+    perform_attack for a list of (attacker, target) pairs in one go (see
+    rules.attack_batch): all dice rolled in one NumPy call, damage applied
+    in order, fighters who drop mid-batch skipped. Pairs out of reach are
+    skipped too. Returns the rules results array, one row per pair.
+    """
+    import numpy as np  # only the batch path needs NumPy
+
+    rng = rng if rng is not None else np.random.default_rng()
+    results = np.zeros((len(pairs), 5), dtype=np.int16)
+    results[:, rules.OUTCOME] = rules.SKIPPED
+    events = []
+    rows, attackers, targets, attack_dice, defend_dice, defence_odds = [], [], [], [], [], []
+    fighters, index = [], {}
+    for row, (attacker, target) in enumerate(pairs):
+        if not attacker.is_adjacent(target):
+            events += rules.out_of_reach(attacker.char_class, target.char_class)
+            results[row, rules.HP] = target.hp
+            continue
+        rows.append(row)
+        for fighter, column in ((attacker, attackers), (target, targets)):
+            number = index.get(id(fighter))
+            if number is None:
+                number = index[id(fighter)] = len(fighters)
+                fighters.append(fighter)
+            column.append(number)
+        attack_dice.append(attacker.calculate_attack_dice())
+        defend_dice.append(target.calculate_defence_dice())
+        defence_odds.append(rules.FACE_ODDS[target.defence_key])
+
+    if rows:
+        hp, batch = rules.attack_batch(
+            attackers, targets, attack_dice, defend_dice, defence_odds, [f.hp for f in fighters], rng
+        )
+        results[rows] = batch
+        for fighter, left in zip(fighters, hp.tolist()):
+            fighter.hp = left
+        if rules.listening(sink):
+            events += rules.batch_events(
+                batch,
+                [fighters[a].char_class for a in attackers],
+                [fighters[t].char_class for t in targets],
+                [fighters[t].defence_key for t in targets],
+            )
+    rules.emit(events, sink)
+    return results
+
+
 # ==========================================
 # 2. SUB-CLASSES
 # ==========================================
 
 
 class Monster(Entity):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.defence_key = "black_shields"
 
 
-class Hero(Entity):__
+class Hero(Entity):
     """Hero with equipment and rolling logic"""
 
+    __slots__ = ("name", "hand", "primary_weapon", "slots", "buffs", "_stats", "gold", "inventory")
+
     def __init__(
         self,
         name,
@@ -111,7 +191,11 @@ class Hero(Entity):__
         super().__init__(char_class, 0, attack, defend, hp, mp, x, y)
         self.name = name
         self.defence_key = "white_shields"
-        self.spells = []
+        # Spells held, one bit per spells.SpellRegistry id
+        self.hand = 0
+        # Treasure picked up on a quest (gold coins, item names)
+        self.gold = 0
+        self.inventory = []
 
         # Pull weapon/armour data from the JSON library
         weapon_lib = GAME_DATA.get("weapons", {})
@@ -127,48 +211,139 @@ class Hero(Entity):__
             "body": armour_lib.get("Empty", null_item),
             "off_hand": armour_lib.get("Empty", null_item),
         }
-
-    def cast_spell(self, spell_name, target=None):
-        """Spells discarded after use."""
-        spell = next((s for s in self.spells if s["name"] == spell_name), None)
-
-        if spell:
-            print(f"{self.name} casts {spell['name']}! ***")
-            # Logic for spell effects (Damage/Healing) to go here later
-            self.spells.remove(spell)
-            return True
-        else:
+        # Temporary bonuses, e.g. {"Rock Skin": {"defence_bonus": 1}}
+        self.buffs = {}
+        # (attack dice, defence dice, move penalty); None until next needed
+        self._stats = None
+
+    @timed("spells")
+    def cast_spell(self, spell_name, target=None, game_map=None, rng=random, sink=None):
+        """
+        Spells discarded after use. Attack and CC spells need a target; area
+        spells (e.g. Tempest) hit every enemy in range of it on game_map.
+        Heal, Buff and Utility spells always affect the caster.
+        """
+        from spells import registry  # spells imports this module
+
+        spells = registry()
+        spell_id = spells.ids.get(spell_name)
+        if spell_id is None or not self.hand >> spell_id & 1:
             print(f"ERROR: {self.name} does not have the spell '{spell_name}'!")
             return False
+        if not spells.cast(self, spell_id, target, game_map, rng, sink):
+            return False
+        self.hand &= ~(1 << spell_id)
+        return True
+
+    def spell_names(self):
+        from spells import registry
+
+        return registry().hand_names(self.hand)
+
+    # ------------------
+    # Equipment & buffs
+    # ------------------
+
+    def equip(self, item_name):
+        """
+        Puts on a weapon or piece of armour by name. Illegal choices (Wizard
+        restrictions, shields with two-handed weapons) are refused.
+        """
+        weapon = GAME_DATA["weapons"].get(item_name)
+        armour = GAME_DATA["armour"].get(item_name)
+        item = weapon or armour
+        if item is None:
+            print(f"ERROR: '{item_name}' is not a weapon or armour!")
+            return False
+        if self.char_class == "Wizard" and not item.get("wizard_ok", True):
+            print(f"Illegal Equipment: Wizard cannot use {item_name}.")
+            return False
 
-    def roll_for_movement(self):
-        """Calculates player movement (2d6) minus armour penalties"""
-        roll = random.randint(1, 6) + random.randint(1, 6)
-
+        if weapon:
+            if weapon.get("two_handed") and self.slots["off_hand"].get("slot") == "off_hand":
+                print(f"{item_name} needs both hands. Remove the shield first.")
+                return False
+            self.primary_weapon = weapon
+        else:
+            slot = armour.get("slot")
+            if slot not in self.slots:
+                print(f"ERROR: {item_name} can't be worn.")
+                return False
+            if slot == "off_hand" and self.primary_weapon.get("two_handed"):
+                print(f"Can't hold {item_name} with a two-handed weapon.")
+                return False
+            self.slots[slot] = armour
+
+        self._stats = None
+        return True
+
+    def unequip(self, slot):
+        """Empties "weapon" (back to Unarmed), "head", "body" or "off_hand"."""
+        if slot == "weapon":
+            self.primary_weapon = GAME_DATA["weapons"]["Unarmed"]
+        elif slot in self.slots:
+            self.slots[slot] = GAME_DATA["armour"]["Empty"]
+        else:
+            print(f"ERROR: No such slot '{slot}'!")
+            return False
+        self._stats = None
+        return True
+
+    def apply_buff(self, name, attack_bonus=0, defence_bonus=0, rounds=1):
+        """A stat bonus lasting `rounds` rounds, counting the current one (see expire_buffs)."""
+        self.buffs[name] = {"attack_bonus": attack_bonus, "defence_bonus": defence_bonus, "rounds": rounds}
+        self._stats = None
+
+    def remove_buff(self, name):
+        if self.buffs.pop(name, None) is not None:
+            self._stats = None
+
+    def expire_buffs(self):
+        """End of a round: counts every buff down and drops the ones that have run out."""
+        for name, buff in list(self.buffs.items()):
+            buff["rounds"] -= 1
+            if buff["rounds"] <= 0:
+                self.remove_buff(name)
+
+    def _derive_stats(self):
+        """Works out attack dice, defence dice and move penalty from the kit."""
+        attack = self.base_attack + self.primary_weapon.get("attack_bonus", 0)
+        defence = self.base_defend + sum(
+            item.get("defence_bonus", 0) for item in self.slots.values() if item
+        )
+        # Check for two handed weapon blocking shield use
+        if self.primary_weapon.get("two_handed", False):
+            off_hand = self.slots.get("off_hand") or {}
+            if off_hand.get("slot") == "off_hand":
+                defence -= off_hand.get("defence_bonus", 0)
+        for buff in self.buffs.values():
+            attack += buff["attack_bonus"]
+            defence += buff["defence_bonus"]
         # Plate Mail causes movement penalty
         penalty = sum(
             item.get("move_penalty", 0) for item in self.slots.values() if item
         )
+        self._stats = (attack, defence, penalty)
+        return self._stats
+
+    @timed("movement")
+    def roll_for_movement(self, rng=random, sink=None):
+        """Calculates player movement (2d6) minus armour penalties"""
+        roll = rng.randint(1, 6) + rng.randint(1, 6)
+        penalty = (self._stats or self._derive_stats())[2]
 
         self.movement_remaining = max(1, roll - penalty)
-        print(
-            f"{self.name} rolled a {roll} for movement (Penalty: {penalty}). Total {self.movement_remaining}"
+        rules.emit(
+            [{"type": "movement", "hero": self.name, "roll": roll, "penalty": penalty, "total": self.movement_remaining}],
+            sink,
         )
         return self.movement_remaining
 
     def calculate_attack_dice(self):
-        return self.base_attack + self.primary_weapon.get("attack_bonus", 0)
+        return (self._stats or self._derive_stats())[0]
 
     def calculate_defence_dice(self):
-        bonus = sum(
-            item.get("defence_bonus", 0) for item in self.slots.values() if item
-        )
-        # Check for two handed weapon blocking shield use
-        if self.primary_weapon.get("two_handed", False):
-            off_hand = self.slots.get("off_hand") or {}
-            if off_hand.get("slot") == "off_hand":
-                bonus -= off_hand.get("defence_bonus", 0)
-        return self.base_defend + bonus
+        return (self._stats or self._derive_stats())[1]
 
 
 # ==========================================
@@ -199,13 +374,14 @@ def spawn_hero(hero_name, class_type, x=0, y=0, chosen_spells=None):
         for slot, item in hero.slots.items():
             if not item.get("wizard_ok", True):
                 print(f"Illegal Armour: Wizard cannot wear {slot}. Removing.")
-                hero.slots[slot] = GAME_DATA["armour"]["Empty"]
+                hero.unequip(slot)
 
     if template.get("is_spellcaster") and chosen_spells:
-        spell_lib = GAME_DATA.get("spells", {})
+        from spells import registry
+
+        masks = registry().element_masks
         for element in chosen_spells:
-            element_spells = spell_lib.get(element, [])
-            hero.spells.extend(element_spells)
+            hero.hand |= masks.get(element, 0)
             print(f"Assigning {element} spells to {hero.name}...")
 
     return hero
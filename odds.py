@@ -0,0 +1,147 @@
+import atexit
+import json
+import os
+from math import comb
+
+from models import Dice
+
+# ==========================================
+# EXACT COMBAT ODDS
+# ==========================================
+# Damage from one attack is max(0, skulls - blocks), where skulls come from
+# the attacker's dice and blocks from the defender's dice showing their
+# defence_key shield. Both are binomial, so the whole distribution can be
+# worked out exactly instead of Monte-Carlo'd.
+
+# Next to this module, not wherever the game happens to be started from
+ODDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "combat_odds.json")
+
+SHIELD_ODDS = {
+    "white_shields": Dice.FACE_ODDS[1],
+    "black_shields": Dice.FACE_ODDS[2],
+}
+
+_table = None
+_dirty = False  # entries worked out since the table was last saved
+
+
+def _binomial(n, p):
+    return [comb(n, k) * p**k * (1 - p) ** (n - k) for k in range(n + 1)]
+
+
+def _compute(attack_dice, defend_dice, defence_key):
+    skulls = _binomial(attack_dice, Dice.FACE_ODDS[0])
+    blocks = _binomial(defend_dice, SHIELD_ODDS[defence_key])
+    dist = [0.0] * (attack_dice + 1)
+    for s, ps in enumerate(skulls):
+        for b, pb in enumerate(blocks):
+            dist[max(0, s - b)] += ps * pb
+    return tuple(dist)
+
+
+def _key(attack_dice, defend_dice, defence_key):
+    return f"{attack_dice}:{defend_dice}:{defence_key}"
+
+
+def _read_file():
+    try:
+        with open(ODDS_FILE, "r") as f:
+            return {k: tuple(v) for k, v in json.load(f).items()}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _load_table():
+    global _table
+    if _table is None:
+        _table = _read_file()
+    return _table
+
+
+def save():
+    """
+    Writes new entries to ODDS_FILE (also done once at exit). Entries other
+    processes saved meanwhile are kept, and the file is swapped in whole, so
+    parallel savers never leave it half-written.
+    """
+    global _dirty
+    if not _dirty:
+        return
+    merged = _read_file()
+    merged.update(_table)
+    tmp = f"{ODDS_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(merged, f)
+    os.replace(tmp, ODDS_FILE)
+    _dirty = False
+
+
+@atexit.register
+def _save_at_exit():
+    try:
+        save()
+    except OSError:
+        pass  # only a cache: next run works the odds out again
+
+
+def damage_distribution(attack_dice, defend_dice, defence_key="white_shields"):
+    """Tuple where index n is the chance of dealing exactly n damage."""
+    global _dirty
+    if defence_key not in SHIELD_ODDS:
+        raise ValueError(f"Unknown defence key '{defence_key}'")
+    table = _load_table()
+    key = _key(max(0, attack_dice), max(0, defend_dice), defence_key)
+    dist = table.get(key)
+    if dist is None:
+        dist = table[key] = _compute(max(0, attack_dice), max(0, defend_dice), defence_key)
+        _dirty = True
+    return dist
+
+
+def expected_damage(attack_dice, defend_dice, defence_key="white_shields"):
+    dist = damage_distribution(attack_dice, defend_dice, defence_key)
+    return sum(n * p for n, p in enumerate(dist))
+
+
+def kill_chance(attack_dice, defend_dice, defence_key, hp):
+    """Chance a single attack deals at least `hp` damage."""
+    dist = damage_distribution(attack_dice, defend_dice, defence_key)
+    return sum(dist[max(0, hp) :])
+
+
+def precompute(max_dice=12):
+    """Fills the table for every dice pair up to max_dice and saves it once."""
+    global _dirty
+    table = _load_table()
+    for a in range(max_dice + 1):
+        for d in range(max_dice + 1):
+            for defence_key in SHIELD_ODDS:
+                key = _key(a, d, defence_key)
+                if key not in table:
+                    table[key] = _compute(a, d, defence_key)
+                    _dirty = True
+    save()
+    return len(table)
+
+
+# ==========================================
+# ENTITY HELPERS
+# ==========================================
+
+
+def attack_odds(attacker, target):
+    """Exact damage distribution for attacker.perform_attack(target)."""
+    return damage_distribution(
+        attacker.calculate_attack_dice(),
+        target.calculate_defence_dice(),
+        target.defence_key,
+    )
+
+
+def attack_summary(attacker, target):
+    attack_dice = attacker.calculate_attack_dice()
+    defend_dice = target.calculate_defence_dice()
+    return {
+        "expected_damage": expected_damage(attack_dice, defend_dice, target.defence_key),
+        "kill_chance": kill_chance(attack_dice, defend_dice, target.defence_key, target.hp),
+    }
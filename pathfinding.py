@@ -0,0 +1,228 @@
+from collections import deque
+from heapq import heappop, heappush
+
+import numpy as np
+
+from map import WALKABLE
+
+# ==========================================
+# GRID PATHFINDING
+# ==========================================
+# Movement in HeroQuest is square by square, orthogonally, and nobody can
+# walk through an occupied square. Attacks use the Entity.is_adjacent rule:
+# orthogonal only, unless the weapon has "diagonal": true.
+#
+# Distance fields (how far every square is from being able to attack
+# something) are NumPy int32 grids built by a breadth-first search that
+# only touches its frontier. The Zargon phase (turns.plan_moves) and hero
+# pathing (path_to_attack) both read them.
+
+ORTHOGONAL = ((0, -1), (1, 0), (0, 1), (-1, 0))
+ALL_AROUND = ORTHOGONAL + ((1, -1), (1, 1), (-1, 1), (-1, -1))
+
+
+def steps_for(diagonal):
+    return ALL_AROUND if diagonal else ORTHOGONAL
+
+
+def reaches_diagonally(entity):
+    """Mirrors Entity.is_adjacent: only diagonal weapons hit diagonally."""
+    return getattr(entity, "primary_weapon", {}).get("diagonal", False)
+
+
+def reachable(game_map, entity, budget=None):
+    """
+    Every square `entity` can walk to with `budget` steps (defaults to its
+    movement_remaining). Returns {(x, y): steps}, including where it stands.
+    """
+    if budget is None:
+        budget = entity.movement_remaining
+    occupants = game_map.occupants
+    walkable = game_map.is_walkable
+    start = (entity.x, entity.y)
+    seen = {start: 0}
+    frontier = deque([start])
+
+    while frontier:
+        x, y = frontier.popleft()
+        cost = seen[(x, y)] + 1
+        if cost > budget:
+            continue
+        for dx, dy in ORTHOGONAL:
+            nxt = (x + dx, y + dy)
+            if nxt in seen or nxt in occupants or not walkable(*nxt):
+                continue
+            seen[nxt] = cost
+            frontier.append(nxt)
+    return seen
+
+
+def find_path(game_map, entity, goal):
+    """
+    A* from the entity to `goal` (an (x, y) tuple). Returns the list of
+    squares to step through, ending on goal, or None if it can't be reached.
+    """
+    start = (entity.x, entity.y)
+    if start == goal:
+        return []
+    if not game_map.is_free(*goal):
+        return None
+    occupants = game_map.occupants
+    walkable = game_map.is_walkable
+    gx, gy = goal
+
+    came_from = {start: None}
+    cost = {start: 0}
+    heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start)]
+
+    while heap:
+        _, g, current = heappop(heap)
+        if current == goal:
+            path = []
+            while current != start:
+                path.append(current)
+                current = came_from[current]
+            return path[::-1]
+        if g > cost[current]:
+            continue
+        x, y = current
+        for dx, dy in ORTHOGONAL:
+            nxt = (x + dx, y + dy)
+            if nxt in occupants or not walkable(*nxt):
+                continue
+            if g + 1 < cost.get(nxt, g + 2):
+                cost[nxt] = g + 1
+                came_from[nxt] = current
+                h = abs(nxt[0] - gx) + abs(nxt[1] - gy)
+                heappush(heap, (g + 1 + h, g + 1, nxt))
+    return None
+
+
+UNREACHABLE = np.iinfo(np.int32).max
+MAX_FIELD_CELLS = 4_000_000  # squares of cached fields kept per map (16 MB)
+
+
+def passable_grid(game_map):
+    """Boolean (height, width) array of non-wall squares, cached per layout."""
+    cached = getattr(game_map, "passable", None)
+    if cached is not None and cached[0] == game_map.layout_version:
+        return cached[1]
+    tiles = np.frombuffer(game_map.tiles, dtype=np.uint8).reshape(game_map.height, game_map.width)
+    grid = np.isin(tiles, WALKABLE)
+    game_map.passable = (game_map.layout_version, grid)
+    return grid
+
+
+def attack_distances(passable, xs, ys, diagonal=False, goal_xs=None, goal_ys=None):
+    """
+    Steps from every square to the nearest square that can attack one of
+    the figures at (xs, ys) (1 = can attack now). The figures' own squares
+    and walls block; nobody else is looked at. Returns a (height, width)
+    int32 array, UNREACHABLE where no such square can be reached.
+
+    A breadth-first search over flat square numbers that only ever touches
+    the frontier, so it costs O(squares reached), not O(area x diameter).
+    Given goal_xs/ys it stops once they all have a distance: everything
+    nearer is done by then.
+    """
+    h, w = passable.shape
+    # A wall of False round the edge, so x +/- 1 never wraps onto another row
+    pw = w + 2
+    open_sq = np.zeros((h + 2) * pw, dtype=bool)
+    open_sq.reshape(h + 2, pw)[1:-1, 1:-1] = passable
+    dist = np.full(open_sq.shape, UNREACHABLE, dtype=np.int32)
+    sources = (np.asarray(ys, dtype=np.intp) + 1) * pw + np.asarray(xs, dtype=np.intp) + 1
+    open_sq[sources] = False
+    goals = None
+    if goal_xs is not None:
+        goals = (np.asarray(goal_ys, dtype=np.intp) + 1) * pw + np.asarray(goal_xs, dtype=np.intp) + 1
+    claim = np.empty(open_sq.shape, dtype=np.intp)  # dedupes without sorting
+
+    around = np.array([dy * pw + dx for dx, dy in steps_for(diagonal)], dtype=np.intp)
+    frontier = sources
+    step = 1
+    while len(frontier):
+        grown = (frontier[:, None] + around).ravel()
+        grown = grown[open_sq[grown]]
+        order = np.arange(len(grown))
+        claim[grown] = order
+        frontier = grown[claim[grown] == order]
+        open_sq[frontier] = False
+        dist[frontier] = step
+        if goals is not None:
+            goals = goals[dist[goals] == UNREACHABLE]
+            if not len(goals):
+                break
+        # Only the first step (onto an attack square) can be diagonal
+        around = np.array([dy * pw + dx for dx, dy in ORTHOGONAL], dtype=np.intp)
+        step += 1
+    return dist.reshape(h + 2, pw)[1:-1, 1:-1]
+
+
+def distance_field(game_map, target, diagonal=False):
+    """
+    attack_distances() to `target` (an (x, y) tuple) for anyone who attacks
+    orthogonally (or diagonally if diagonal=True), as field[y, x].
+
+    Figures are left out (callers treat them as blockers as they go), so
+    the field is cached on the map until the layout changes, through any
+    number of moves. The cache holds at most MAX_FIELD_CELLS squares' worth,
+    dropping the oldest field first.
+    """
+    key = (target, diagonal)
+    fields = game_map.distance_fields
+    field = fields.get(key)
+    if field is not None:
+        return field
+
+    field = attack_distances(passable_grid(game_map), [target[0]], [target[1]], diagonal)
+    keep = max(1, MAX_FIELD_CELLS // field.size)
+    while len(fields) >= keep:
+        del fields[next(iter(fields))]
+    fields[key] = field
+    return field
+
+
+def path_to_attack(game_map, attacker, target):
+    """
+    Shortest walk that ends with `attacker` able to hit `target`, around
+    any figures in the way. Returns [] if it already can, None if no free
+    attack square can be reached.
+
+    A* with the cached distance field as the estimate: it is exact when
+    nobody is in the way, so then the search just walks straight downhill.
+    """
+    at = distance_field(game_map, (target.x, target.y), reaches_diagonally(attacker)).item
+    start = (attacker.x, attacker.y)
+    here = at(start[1], start[0])
+    if here == UNREACHABLE:
+        return None
+    if here == 1:
+        return []
+    occupants = game_map.occupants
+    width, height = game_map.width, game_map.height
+
+    came_from = {start: None}
+    cost = {start: 0}
+    heap = [(here - 1, 0, start)]
+    while heap:
+        _, g, current = heappop(heap)
+        x, y = current
+        if current != start and at(y, x) == 1:
+            path = []
+            while current != start:
+                path.append(current)
+                current = came_from[current]
+            return path[::-1]
+        if g > cost[current]:
+            continue
+        for dx, dy in ORTHOGONAL:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or (nx, ny) in occupants:
+                continue
+            d = at(ny, nx)
+            if d != UNREACHABLE and g + 1 < cost.get((nx, ny), g + 2):
+                cost[(nx, ny)] = g + 1
+                came_from[(nx, ny)] = current
+                heappush(heap, (g + d, g + 1, (nx, ny)))
+    return None
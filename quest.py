@@ -0,0 +1,160 @@
+"""
+Quest files, loaded a room at a time.
+
+A quest is a plain text file, one record per line:
+
+    # comments and blank lines are ignored
+    QUEST {"name": "The Trial", "width": 26, "height": 19, "start": [2, 2]}
+    ROOM <id> <x> <y> <w> <h> {"doors": [[x, y]], "corridors": [[x0, y0, x1, y1]],
+                               "monsters": [{"type": "Goblin", "x": 5, "y": 5}],
+                               "treasure": [{"x": 3, "y": 3, "gold": 25}],
+                               "traps": [{"x": 4, "y": 2, "damage": 1}]}
+
+(each ROOM record is on a single line). The header may also give a
+"sight_radius"; it defaults to map.SIGHT_RADIUS. A room lists the doors in its own
+walls and the door at the far end of each corridor it owns, so the way
+on is there before the next room is loaded. Opening a quest only reads the
+numbers at the front of each ROOM line and remembers where the line
+starts in the file. A room's JSON is parsed, its floor carved and its
+monsters spawned the first time a hero steps into it or onto its
+doorway, so a long campaign opens instantly and memory grows with the
+part that has been explored.
+"""
+
+import json
+
+from map import SIGHT_RADIUS, WALL, Map
+from models import spawn_monster
+
+# Rooms are bucketed into CHUNK x CHUNK blocks so finding the room under a
+# hero's feet only looks at a handful of candidates
+CHUNK = 16
+
+
+class QuestError(ValueError):
+    """The quest file is missing its header or has a malformed line."""
+
+
+class Quest:
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.rooms = {}  # id -> (x, y, w, h, byte offset of the line)
+        self._chunks = {}  # (cx, cy) -> [room ids]
+        self.loaded = set()
+        self.treasure = {}  # (x, y) -> {"gold": n} or {"item": name}
+        self.traps = {}  # (x, y) -> {"damage": n}
+        self.monsters = []
+        self._index()
+
+        width, height = self.header["width"], self.header["height"]
+        radius = self.header.get("sight_radius", SIGHT_RADIUS)
+        self.game_map = Map(width, height, fill=WALL, sight_radius=radius)
+
+    # ------------------
+    # Index pass
+    # ------------------
+
+    def _index(self):
+        with open(self.path, "rb") as f:
+            offset = 0
+            for number, raw in enumerate(f, start=1):
+                line = raw.strip()
+                if line.startswith(b"QUEST "):
+                    self.header = json.loads(line[6:])
+                elif line.startswith(b"ROOM "):
+                    try:
+                        _, room_id, x, y, w, h, _ = line.split(b" ", 6)
+                        x, y, w, h = int(x), int(y), int(w), int(h)
+                    except ValueError:
+                        raise QuestError(f"{self.path}:{number}: bad ROOM line")
+                    room_id = room_id.decode()
+                    self.rooms[room_id] = (x, y, w, h, offset)
+                    # The ring round a room (walls and doorways) counts as part of it
+                    for cy in range((y - 1) // CHUNK, (y + h) // CHUNK + 1):
+                        for cx in range((x - 1) // CHUNK, (x + w) // CHUNK + 1):
+                            self._chunks.setdefault((cx, cy), []).append(room_id)
+                elif line and not line.startswith(b"#"):
+                    raise QuestError(f"{self.path}:{number}: unknown record")
+                offset += len(raw)
+        if self.header is None:
+            raise QuestError(f"{self.path}: no QUEST header line")
+
+    # ------------------
+    # Lazy room loading
+    # ------------------
+
+    def rooms_at(self, x, y):
+        """Ids of the rooms whose floor or surrounding wall covers (x, y)."""
+        found = []
+        for room_id in self._chunks.get((x // CHUNK, y // CHUNK), ()):
+            rx, ry, w, h, _ = self.rooms[room_id]
+            if rx - 1 <= x <= rx + w and ry - 1 <= y <= ry + h:
+                found.append(room_id)
+        return found
+
+    def load_room(self, room_id):
+        """Reads, carves and populates one room. Returns the monsters spawned."""
+        if room_id in self.loaded:
+            return []
+        x, y, w, h, offset = self.rooms[room_id]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            room = json.loads(f.readline().strip().split(b" ", 6)[6])
+        self.loaded.add(room_id)
+
+        game_map = self.game_map
+        game_map.carve_room(x, y, w, h)
+        for x0, y0, x1, y1 in room.get("corridors", []):
+            game_map.carve_corridor(x0, y0, x1, y1)
+        for dx, dy in room.get("doors", []):
+            game_map.add_door(dx, dy)
+        for trap in room.get("traps", []):
+            self.traps[(trap["x"], trap["y"])] = trap
+        for chest in room.get("treasure", []):
+            self.treasure[(chest["x"], chest["y"])] = chest
+
+        spawned = []
+        for placement in room.get("monsters", []):
+            monster = spawn_monster(placement["type"], placement["x"], placement["y"])
+            if game_map.place(monster):
+                spawned.append(monster)
+        self.monsters.extend(spawned)
+        return spawned
+
+    def enter(self, x, y):
+        """Loads every not-yet-loaded room at (x, y). Returns the new monsters."""
+        spawned = []
+        for room_id in self.rooms_at(x, y):
+            spawned += self.load_room(room_id)
+        return spawned
+
+    def start(self):
+        """Loads the starting room and returns the (x, y) the heroes begin on."""
+        x, y = self.header["start"]
+        self.enter(x, y)
+        return x, y
+
+    # ------------------
+    # Squares with something on them
+    # ------------------
+
+    def step_on(self, hero):
+        """
+        Springs a trap or picks up treasure where the hero now stands. Gold
+        goes in hero.gold and items in hero.inventory. Returns (trap, chest).
+        """
+        square = (hero.x, hero.y)
+        trap = self.traps.pop(square, None)
+        if trap:
+            print(f"!!! {hero.name} sets off a trap! !!!")
+            hero.take_damage(trap.get("damage", 1))
+        chest = self.treasure.pop(square, None)
+        if chest:
+            if "gold" in chest:
+                hero.gold += chest["gold"]
+                print(f"{hero.name} finds {chest['gold']} gold!")
+            else:
+                hero.inventory.append(chest["item"])
+                print(f"{hero.name} finds a {chest['item']}!")
+        return trap, chest
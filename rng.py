@@ -0,0 +1,102 @@
+import json
+import random
+
+# ==========================================
+# GAME RNG & REPLAY
+# ==========================================
+# Every game gets its own GameRNG instead of sharing the global `random`
+# module. It is a normal random.Random (so it can be handed to anything
+# that expects one) that also logs every roll, every typed command and
+# anything read from outside the game (like a save file). Saving that log
+# and feeding it to ReplayRNG re-runs the game exactly, with the same
+# seed, the same answers at every prompt, and a check that each roll comes
+# out the same as it did the first time.
+
+
+class ReplayFinished(Exception):
+    """The replay has used up every logged command."""
+
+
+class ReplayDiverged(Exception):
+    """A roll or command came out differently from the log: the rules changed."""
+
+
+class GameRNG(random.Random):
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        self.seed_value = seed
+        self.events = []
+        super().__init__(seed)
+
+    def randint(self, a, b):
+        value = super().randint(a, b)
+        self.events.append(["roll", a, b, value])
+        return value
+
+    def choice(self, seq):
+        value = super().choice(seq)
+        self.events.append(["choice", len(seq), value if isinstance(value, str) else None])
+        return value
+
+    def ask(self, prompt=""):
+        """input() that goes in the log."""
+        return self.command(input(prompt))
+
+    def command(self, answer):
+        """Logs a command read some other way (a key press, say) and returns it."""
+        self.events.append(["cmd", answer])
+        return answer
+
+    def external(self, kind, fetch):
+        """Runs fetch() (e.g. reading a save) and logs what it returned."""
+        value = fetch()
+        self.events.append(["ext", kind, value])
+        return value
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"seed": self.seed_value, "events": self.events}, f)
+
+
+class ReplayRNG(GameRNG):
+    """Plays a saved GameRNG log back. Prompts are answered from the log."""
+
+    def __init__(self, log):
+        super().__init__(log["seed"])
+        self.expected = log["events"]
+        self.pos = 0
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def _next(self, kind):
+        if self.pos >= len(self.expected):
+            raise ReplayFinished()
+        event = self.expected[self.pos]
+        if event[0] != kind:
+            raise ReplayDiverged(f"event {self.pos}: expected {event[0]}, game asked for {kind}")
+        self.pos += 1
+        return event
+
+    def randint(self, a, b):
+        logged = self._next("roll")
+        value = random.Random.randint(self, a, b)
+        if logged[1:] != [a, b, value]:
+            raise ReplayDiverged(f"event {self.pos - 1}: rolled {[a, b, value]}, log has {logged[1:]}")
+        return value
+
+    def choice(self, seq):
+        logged = self._next("choice")
+        value = random.Random.choice(self, seq)
+        if logged[1] != len(seq):
+            raise ReplayDiverged(f"event {self.pos - 1}: choice from {len(seq)}, log has {logged[1]}")
+        return value
+
+    def ask(self, prompt=""):
+        return self._next("cmd")[1]
+
+    def external(self, kind, fetch):
+        return self._next("ext")[2]
@@ -0,0 +1,254 @@
+import json
+import random
+import sys
+
+# ==========================================
+# 1. RULES CORE
+# ==========================================
+# The combat rules in one place. Functions here only roll dice and work out
+# what happens: they return the new hit points and a list of events (plain
+# dicts, JSON-ready) and never print. Callers store the hit points and hand
+# the events to a sink: text for the terminal, nothing for simulations, or
+# a JSON log.
+#
+# Combat dice: 1-3 skull, 4-5 white shield, 6 black shield. Heroes block on
+# white shields, monsters on black. heroquest_mobile1.0.py's "hit on 4+,
+# block on 5+" has exactly the skull / white shield odds, so its fighters
+# simply all defend with white shields.
+
+
+def combat_dice(num_dice, rng=random):
+    """Rolls num_dice combat dice: {"skulls": n, "white_shields": n, "black_shields": n}."""
+    results = {"skulls": 0, "white_shields": 0, "black_shields": 0}
+    for _ in range(num_dice):
+        roll = rng.randint(1, 6)
+        if roll <= 3:  # 1, 2, 3 (50% Skull)
+            results["skulls"] += 1
+        elif roll <= 5:  # 4, 5 (33% White Shield)
+            results["white_shields"] += 1
+        else:  # 6 (16% Black Shield)
+            results["black_shields"] += 1
+    return results
+
+
+def damage(target, hp, amount):
+    """(new hp, events) for `target` (a name) on `hp` taking `amount` damage."""
+    hp = max(0, hp - amount)
+    events = [{"type": "damage", "target": target, "amount": amount, "hp": hp}]
+    if hp == 0:
+        events.append({"type": "slain", "target": target})
+    return hp, events
+
+
+def attack(attacker, target, attack_dice, defend_dice, defence_key, hp, rng=random):
+    """
+    One attack roll: skulls from attack_dice minus the defender's
+    defence_key shields from defend_dice. Returns (target's new hp, events).
+    """
+    skulls = combat_dice(attack_dice, rng)["skulls"]
+    blocks = combat_dice(defend_dice, rng)[defence_key]
+    dealt = max(0, skulls - blocks)
+    events = [
+        {
+            "type": "attack",
+            "attacker": attacker,
+            "target": target,
+            "skulls": skulls,
+            "blocks": blocks,
+            "defence_key": defence_key,
+            "damage": dealt,
+        }
+    ]
+    if dealt == 0:
+        events.append({"type": "blocked", "target": target})
+        return hp, events
+    hp, hurt = damage(target, hp, dealt)
+    return hp, events + hurt
+
+
+def out_of_reach(attacker, target):
+    return [{"type": "out_of_reach", "attacker": attacker, "target": target}]
+
+
+# ==========================================
+# 2. SINKS
+# ==========================================
+# Anything with emit(events). Frontends pass one in; when they don't, the
+# shared default (terminal text unless changed with set_sink) is used.
+
+TEXT = {
+    "out_of_reach": "!!! {target} is too far away to attack! !!!",
+    "attack": "\n--- Combat: {attacker} vs {target} ---\nAttacker: {skulls} Skulls | Defender: {blocks} {shield}",
+    "blocked": "The attack was completely blocked!",
+    "damage": "{target} takes {amount} damage! HP is now {hp}",
+    "slain": "!!! {target} has been slain!!!",
+    "cast": "{caster} casts {spell}! ***",
+    "no_target": "ERROR: {spell} needs a target!",
+    "resisted": "{target} shrugs off the {spell}!",
+    "heal": "{target} is healed. HP is now {hp}",
+    "held": "{target} is held by {spell} for {turns} turn(s)!",
+    "movement": "{hero} rolled a {roll} for movement (Penalty: {penalty}). Total {total}",
+}
+
+
+def describe(event):
+    """The terminal text for one event."""
+    fields = event
+    if "defence_key" in event:
+        fields = dict(event, shield=event["defence_key"].replace("_", " ").title())
+    return TEXT[event["type"]].format(**fields)
+
+
+class TextSink:
+    """Prints events the way the game always has (through print, so it can be captured)."""
+
+    def emit(self, events):
+        for event in events:
+            print(describe(event))
+
+
+class NullSink:
+    """Drops everything: for simulations and benchmarks."""
+
+    def emit(self, events):
+        pass
+
+
+class JsonLogSink:
+    """Appends each event as one JSON line to a file (or an open stream)."""
+
+    def __init__(self, target=None):
+        self._own = isinstance(target, str)
+        self.stream = open(target, "a") if self._own else (target or sys.stdout)
+
+    def emit(self, events):
+        for event in events:
+            self.stream.write(json.dumps(event) + "\n")
+
+    def close(self):
+        """Closes a file it opened; a stream it was handed is only flushed."""
+        if self._own:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+_sink = TextSink()
+
+
+def set_sink(sink):
+    """Changes the default sink. Returns the previous one."""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def emit(events, sink=None):
+    (sink or _sink).emit(events)
+    return events
+
+
+def listening(sink=None):
+    """False when events sent to `sink` (or the default) would just be dropped."""
+    return not isinstance(sink or _sink, NullSink)
+
+
+# ==========================================
+# 3. BATCHED ATTACKS
+# ==========================================
+# attack() for many pairs at once. Every die for every pair is rolled in a
+# single NumPy call (a binomial count per pair, the same odds as rolling
+# them one by one), then damage is applied in pair order: a fighter who has
+# already dropped neither strikes nor gets struck again. NumPy is imported
+# only here, so the single-attack path keeps working without it.
+#
+# Results are one int16 row per pair, columns below. Events are only built
+# (by batch_events) for callers that want them.
+
+SKULLS, BLOCKS, DAMAGE, HP, OUTCOME = range(5)
+STRUCK, SLAIN, SKIPPED = range(3)  # OUTCOME values
+FACE_ODDS = {"skulls": 3 / 6, "white_shields": 2 / 6, "black_shields": 1 / 6}
+
+
+def attack_batch(attackers, targets, attack_dice, defend_dice, defence_odds, hp, rng):
+    """
+    Resolves pair i = attackers[i] striking targets[i] (fighter numbers
+    indexing `hp`, the hit points before the batch). defence_odds[i] is the
+    chance one of the target's dice blocks (FACE_ODDS[defence_key]); rng is
+    a numpy.random.Generator. Returns (hit points after, results array).
+    """
+    import numpy as np
+
+    # A set beats np.isin for a few dozen pairs
+    one_sided = set(attackers).isdisjoint(targets)
+    attackers = np.asarray(attackers, dtype=np.intp)
+    targets = np.asarray(targets, dtype=np.intp)
+    hp = np.array(hp, dtype=np.int16)
+    n = len(targets)
+
+    skulls = rng.binomial(attack_dice, FACE_ODDS["skulls"], size=n)
+    blocks = rng.binomial(defend_dice, defence_odds, size=n)
+    dealt = np.maximum(skulls - blocks, 0)
+    results = np.empty((n, 5), dtype=np.int16)
+    results[:, SKULLS], results[:, BLOCKS], results[:, DAMAGE] = skulls, blocks, dealt
+    if not n:
+        return hp, results
+
+    if one_sided:
+        # Nobody in the batch is hit before striking, so each target's
+        # hits just stack up in pair order: a running total per target
+        order = np.argsort(targets, kind="stable")
+        grouped = targets[order]
+        hits = np.where(hp[attackers[order]] > 0, dealt[order], 0)
+        taken = np.cumsum(hits) - hits
+        first = np.empty(n, dtype=bool)
+        first[0] = True
+        np.not_equal(grouped[1:], grouped[:-1], out=first[1:])
+        taken -= taken[np.maximum.accumulate(np.where(first, np.arange(n), 0))]
+        before = hp[grouped] - taken
+        after = np.maximum(before - hits, 0)
+        outcome = np.where(before <= 0, SKIPPED, np.where(after == 0, SLAIN, STRUCK))
+        outcome[hp[attackers[order]] <= 0] = SKIPPED
+        results[order, HP], results[order, OUTCOME] = after, outcome
+        results[results[:, OUTCOME] == SKIPPED, DAMAGE] = 0
+        np.minimum.at(hp, grouped, after.astype(np.int16))
+        return hp, results
+
+    # Fighters on both sides: walk the pairs, plain ints only
+    left = hp.tolist()
+    column = []
+    for a, t, d in zip(attackers.tolist(), targets.tolist(), dealt.tolist()):
+        if left[a] <= 0 or left[t] <= 0:
+            column.append((0, left[t], SKIPPED))
+            continue
+        left[t] = max(0, left[t] - d)
+        column.append((d, left[t], SLAIN if left[t] == 0 else STRUCK))
+    results[:, DAMAGE:] = column
+    return np.array(left, dtype=np.int16), results
+
+
+def batch_events(results, attacker_names, target_names, defence_keys):
+    """The events attack() would have produced for each pair that wasn't skipped."""
+    events = []
+    for row, attacker, target, key in zip(results.tolist(), attacker_names, target_names, defence_keys):
+        skulls, blocks, dealt, hp, outcome = row
+        if outcome == SKIPPED:
+            continue
+        events.append(
+            {
+                "type": "attack",
+                "attacker": attacker,
+                "target": target,
+                "skulls": skulls,
+                "blocks": blocks,
+                "defence_key": key,
+                "damage": dealt,
+            }
+        )
+        if dealt == 0:
+            events.append({"type": "blocked", "target": target})
+            continue
+        events.append({"type": "damage", "target": target, "amount": dealt, "hp": hp})
+        if outcome == SLAIN:
+            events.append({"type": "slain", "target": target})
+    return events
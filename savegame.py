@@ -0,0 +1,214 @@
+import atexit
+import json
+import os
+import queue
+import threading
+
+# ==========================================
+# SAVE JOURNAL
+# ==========================================
+# The save lives in two files:
+#   heroquest_save.json     - a full snapshot (same layout save_game always wrote)
+#   heroquest_save.journal  - one JSON delta per line, appended since that snapshot
+#
+# Deltas only ever *set* values ({"gold": 1300}, {"heroes": {"0": {"hp": 5}}},
+# {"hero_count": 3} when the party shrinks), so replaying one twice is harmless. That keeps compaction crash-safe: the
+# new snapshot is written to a temp file and swapped in with os.replace(), and
+# only then is the journal emptied. All disk work happens on a background
+# thread so the game loop never waits on it.
+
+
+def diff(old, new):
+    """Delta that turns state `old` into `new` (None if nothing changed)."""
+    delta = {}
+    for key, value in new.items():
+        if key == "heroes":
+            heroes = {}
+            old_heroes = old.get("heroes", [])
+            for i, hero in enumerate(value):
+                before = old_heroes[i] if i < len(old_heroes) else {}
+                changed = {k: v for k, v in hero.items() if before.get(k) != v}
+                if changed:
+                    heroes[str(i)] = changed
+            if heroes:
+                delta["heroes"] = heroes
+            if len(value) < len(old_heroes):
+                delta["hero_count"] = len(value)  # the party shrank: apply drops the rest
+        elif old.get(key) != value:
+            delta[key] = value
+    return delta or None
+
+
+def apply(state, delta):
+    for key, value in delta.items():
+        if key == "heroes":
+            heroes = state.setdefault("heroes", [])
+            for i, changed in value.items():
+                i = int(i)
+                while len(heroes) <= i:
+                    heroes.append({})
+                heroes[i].update(changed)
+        elif key == "hero_count":
+            del state.setdefault("heroes", [])[value:]
+        else:
+            state[key] = value
+    return state
+
+
+def read_save(snapshot_path, journal_path):
+    """Snapshot plus every intact journal line. Returns None if there's no save."""
+    try:
+        with open(snapshot_path, "r") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+    except ValueError:
+        print(f"Warning: {snapshot_path} is damaged, rebuilding from the journal.")
+        state = None
+
+    try:
+        with open(journal_path, "r") as f:
+            for line in f:
+                try:
+                    delta = json.loads(line)
+                except ValueError:
+                    break  # torn last write from a crash; everything before it is good
+                state = apply(state if state is not None else {}, delta)
+    except FileNotFoundError:
+        pass
+    return state
+
+
+class SaveJournal:
+    def __init__(self, snapshot_path="heroquest_save.json", compact_every=50):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        self.compact_every = compact_every
+        # Last exception from the writer thread, re-raised by flush()
+        self.error = None
+        self._broken = False  # the writer couldn't even open the save
+
+        # What the caller last recorded (used for diffing on the caller's thread)
+        self._last = read_save(self.snapshot_path, self.journal_path) or {}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name="save-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------
+    # Game-loop side
+    # ------------------
+
+    def record(self, state):
+        """Queues whatever changed since the last record(). Never blocks on disk."""
+        delta = diff(self._last, state)
+        if delta:
+            # Detached copy; a value JSON can't store fails here, before anything is queued
+            last = json.loads(json.dumps(state))
+            self._put("delta", delta)
+            self._last = last
+        return delta
+
+    def compact(self):
+        """Asks the writer to fold the journal into a fresh snapshot."""
+        self._put("compact", None)
+
+    def flush(self):
+        """
+        Blocks until everything queued so far has been written, then
+        re-raises the error if any write since the last flush failed.
+        """
+        self._queue.join()
+        error = self.error
+        if error is not None:
+            if not self._broken:
+                self.error = None
+            raise error
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(("stop", None))
+            self._thread.join()
+
+    def load(self):
+        """What's on disk once queued writes are done (a failed one stays for flush() to report)."""
+        self._queue.join()
+        return read_save(self.snapshot_path, self.journal_path)
+
+    def _put(self, kind, value):
+        if not self._thread.is_alive():
+            raise RuntimeError("The save journal is closed")
+        self._queue.put((kind, value))
+
+    # ------------------
+    # Writer thread
+    # ------------------
+    # Every item taken off the queue is marked done whatever happens, so
+    # flush() and load() can't hang on a dead writer. Errors are kept for
+    # flush() instead.
+
+    def _writer(self):
+        try:
+            state = read_save(self.snapshot_path, self.journal_path) or {}
+            # Fold in anything left by a previous session first. This also
+            # drops a torn last line so new deltas never get glued onto it.
+            if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+                self._write_snapshot(state)
+            journal = open(self.journal_path, "w")
+        except Exception as e:
+            # Writing anything now could clobber a save we couldn't read
+            self.error, self._broken = e, True
+            while self._queue.get()[0] != "stop":
+                self._queue.task_done()
+            self._queue.task_done()
+            return
+
+        pending = 0
+        resync = False  # a write failed: the next batch rewrites the snapshot
+        try:
+            while True:
+                batch = [self._queue.get()]
+                # Drain whatever else is waiting so one fsync covers the lot
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = compact = False
+                try:
+                    for kind, delta in batch:
+                        if kind == "delta":
+                            line = json.dumps(delta) + "\n"  # before apply: a bad delta leaves state alone
+                            apply(state, delta)
+                            pending += 1
+                            journal.write(line)
+                        elif kind == "compact":
+                            compact = True
+                        else:
+                            stop = True
+                    journal.flush()
+                    os.fsync(journal.fileno())
+
+                    if resync or (pending and (compact or pending >= self.compact_every)):
+                        journal.close()
+                        self._write_snapshot(state)
+                        journal = open(self.journal_path, "w")
+                        pending, resync = 0, False
+                except Exception as e:
+                    self.error, resync = e, True
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            journal.close()
+
+    def _write_snapshot(self, state):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
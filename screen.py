@@ -0,0 +1,104 @@
+import re
+import sys
+
+# Matches colour/style escapes (e.g. "\033[1;36m") inside a line of text
+SGR = re.compile(r"\033\[[0-9;]*m")
+RESET = "\033[0m"
+
+
+def to_cells(line):
+    """
+    Splits a line into screen cells. Each cell is the active style escape
+    followed by one character, so two cells compare equal only if both the
+    glyph and its colour match.
+    """
+    cells = []
+    style = ""
+    pos = 0
+    for match in SGR.finditer(line):
+        cells.extend(style + ch for ch in line[pos : match.start()])
+        code = match.group()
+        style = "" if code == RESET else style + code
+        pos = match.end()
+    cells.extend(style + ch for ch in line[pos:])
+    return cells
+
+
+class Screen:
+    """
+    Double-buffered terminal output.
+
+    present() takes a frame as a list of lines (ANSI colours allowed),
+    compares it cell by cell with the previous frame and writes only the
+    changed runs using cursor moves, all in one write. Afterwards the cursor
+    sits on the line below the frame with the rest of the screen cleared,
+    so prompts printed after a frame land in the right place.
+
+    With offscreen=True nothing is written and present() returns the frame
+    as a plain string instead, which is what the tests and tools use.
+    """
+
+    def __init__(self, stream=None, offscreen=False):
+        self.stream = stream or sys.stdout
+        self.offscreen = offscreen
+        self.previous = None
+        self.last_patch = ""
+
+    def invalidate(self):
+        """Forces the next frame to be drawn in full (e.g. after a resize)."""
+        self.previous = None
+
+    def present(self, lines):
+        frame = [to_cells(line) for line in lines]
+        out = []
+
+        if self.previous is None:
+            out.append("\033[H\033[2J")
+            old = []
+        else:
+            old = self.previous
+
+        for y, row in enumerate(frame):
+            before = old[y] if y < len(old) else []
+            # Pad with blanks so shorter lines erase what used to be there
+            width = max(len(row), len(before))
+            row_padded = row + [" "] * (width - len(row))
+            x = 0
+            while x < width:
+                if x < len(before) and row_padded[x] == before[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < width and not (x < len(before) and row_padded[x] == before[x]):
+                    x += 1
+                out.append(f"\033[{y + 1};{start + 1}H")
+                out.append(self._run(row_padded[start:x]))
+
+        # Drop whatever lived below the frame last time and park the cursor there
+        out.append(f"\033[{len(frame) + 1};1H\033[J")
+
+        self.previous = frame
+        self.last_patch = "".join(out)
+        if self.offscreen:
+            return "\n".join(SGR.sub("", line) for line in lines)
+        self.stream.write(self.last_patch)
+        self.stream.flush()
+        return None
+
+    @staticmethod
+    def _run(cells):
+        out = []
+        style = None
+        for cell in cells:
+            cell_style, ch = cell[:-1], cell[-1]
+            if cell_style != style:
+                out.append(RESET + cell_style)
+                style = cell_style
+            out.append(ch)
+        out.append(RESET)
+        return "".join(out)
+
+
+# The real terminal. Everything that draws to stdout shares it so the diff
+# always runs against what is actually on screen.
+TERMINAL = Screen()
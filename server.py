@@ -0,0 +1,154 @@
+"""
+Headless game server: many games of main.py in one process.
+
+    python server.py --unix /tmp/heroquest.sock
+    python server.py --port 8765 [--quest quests/the_trial.quest]
+
+Each connection is its own game (map, hero, monsters, turn order and RNG),
+while GAME_DATA and the spell registry are read-only and shared by all of
+them. The protocol is line based. The client sends one command per line:
+
+    w / a / s / d       move
+    g                   walk towards the nearest monster in sight
+    f                   attack an adjacent monster
+    e                   end turn (the monsters move and attack)
+    c <spell name>      cast at the nearest monster in sight
+    look                also send the visible board
+    quit                close the session
+
+and gets one JSON object per line back: the messages the command produced
+plus the hero's status, e.g.
+{"messages": [...], "hp": 4, "mp": 4, "moves": 6, "spells": [...], "gold": 0,
+"inventory": [], "monsters": 1, "over": false}.
+A reply is sent on connect too, after the hero's first movement roll.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+
+from main import capture, handle_key, new_game
+
+COMMAND_KEYS = {"w", "a", "s", "d", "g", "f", "e"}
+
+
+class Session:
+    """One client's game. Only per-game state lives here."""
+
+    __slots__ = ("id", "state")
+
+    def __init__(self, session_id, quest_path=None, rng=None):
+        self.id = session_id
+        self.state, _ = capture(new_game, quest_path, rng or random.Random())
+        self.state.next_turn()
+
+    def command(self, line):
+        """Runs one protocol line. Returns (reply dict, keep the session open?)."""
+        state = self.state
+        verb, _, arg = line.strip().partition(" ")
+        verb = verb.lower()
+        look = False
+
+        if verb in COMMAND_KEYS:
+            handle_key(state, verb)
+        elif verb == "c" and arg:
+            # Same path as typing the name at the spell prompt
+            state.prompt = arg
+            handle_key(state, "\n")
+        elif verb == "look":
+            look = True
+        elif verb == "quit":
+            return {"messages": ["Goodbye."], "over": True}, False
+        else:
+            state.say(f"Unknown command '{line.strip()}'")
+        return self.reply(look), True
+
+    def reply(self, look=False):
+        state, player = self.state, self.state.player
+        reply = {
+            "messages": [text for text, _ in state.messages],
+            "hp": player.hp,
+            "mp": player.mp,
+            "moves": player.movement_remaining,
+            "spells": player.spell_names(),
+            "gold": player.gold,
+            "inventory": list(player.inventory),
+            "monsters": sum(1 for m in state.monsters if m.hp > 0),
+            "over": player.hp <= 0,
+        }
+        # Messages are delivered once instead of timing out on a screen
+        state.messages.clear()
+        if look:
+            reply["frame"] = state.game_map.frame_lines(focus=player)
+        return reply
+
+
+class GameServer:
+    def __init__(self, quest_path=None, seed=None):
+        self.quest_path = quest_path
+        # With a seed, session n always plays the same dice
+        self.seed = seed
+        self.sessions = {}
+        self._next_id = 0
+        self.commands = 0
+
+    def new_session(self):
+        self._next_id += 1
+        rng = random.Random(f"{self.seed}:{self._next_id}") if self.seed is not None else None
+        session = Session(self._next_id, self.quest_path, rng)
+        self.sessions[session.id] = session
+        return session
+
+    async def handle(self, reader, writer):
+        session = self.new_session()
+        try:
+            writer.write(json.dumps(session.reply()).encode() + b"\n")
+            await writer.drain()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply, keep_open = session.command(line.decode(errors="replace"))
+                self.commands += 1
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+                if not keep_open:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.sessions[session.id]
+            writer.close()
+
+    async def serve(self, unix_path=None, host="127.0.0.1", port=8765):
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            server = await asyncio.start_unix_server(self.handle, unix_path, backlog=1024)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        print(f"Serving HeroQuest on {unix_path or f'{host}:{port}'}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-session HeroQuest server")
+    parser.add_argument("--unix", help="listen on this Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--quest", help="quest file every session plays (default: test board)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = GameServer(args.quest, args.seed)
+    try:
+        asyncio.run(server.serve(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# ==========================================
+# LINE OF SIGHT & FOG OF WAR
+# ==========================================
+# What can be seen from a square is a Window: the box of squares around it
+# that sight can reach (Map.sight_reach: the whole board only on maps up to
+# the standard size) with one bit per square of the box in a plain Python int. Memory and
+# work per square are bounded by the sight radius, not the map size, so
+# 1000x1000 maps cost the same per step as the 26x19 board. Fog of war
+# ORs the windows into one int per map row and diffs rows with XOR.
+#
+# The table only knows about walls (the layout). Figures in the way are
+# checked separately in line_of_sight() because they move every turn.
+
+
+def line(x0, y0, x1, y1):
+    """Squares strictly between (x0, y0) and (x1, y1) on a Bresenham line."""
+    squares = []
+    if (x0, y0) == (x1, y1):
+        return squares
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx + dy
+    x, y = x0, y0
+    while True:
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x += sx
+        if e2 <= dx:
+            err += dx
+            y += sy
+        if (x, y) == (x1, y1):
+            return squares
+        squares.append((x, y))
+
+
+class Window:
+    """Squares visible from one spot: a box at (x, y), w by h, one bit per square."""
+
+    __slots__ = ("x", "y", "w", "h", "bits", "_rows")
+
+    def __init__(self, x, y, w, h, bits=0):
+        self.x, self.y, self.w, self.h, self.bits = x, y, w, h, bits
+        self._rows = None
+
+    def contains(self, x, y):
+        dx, dy = x - self.x, y - self.y
+        return 0 <= dx < self.w and 0 <= dy < self.h and bool(self.bits >> (dy * self.w + dx) & 1)
+
+    def rows(self):
+        """One int per row of the window, bit i = square x + i; split once and kept."""
+        if self._rows is None:
+            mask = (1 << self.w) - 1
+            self._rows = [self.bits >> (r * self.w) & mask for r in range(self.h)]
+        return self._rows
+
+
+class SightTable:
+    """
+    Per-layout visibility windows. Entry i holds the Window seen from
+    square i through the walls. Entries are worked out the first time they
+    are asked for and kept until the map's walls change.
+    """
+
+    def __init__(self, game_map):
+        self.game_map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.layout_version = game_map.layout_version
+        self.rows = {}
+        self.open_plan = game_map.is_open_plan()
+        self.everything = None  # the whole board, shared by every square of an open plan
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def visible_from(self, x, y):
+        i = y * self.width + x
+        row = self.rows.get(i)
+        if row is None:
+            row = self.rows[i] = self._build_row(x, y)
+        return row
+
+    def _build_row(self, x0, y0):
+        game_map = self.game_map
+        open_plan = self.open_plan
+        radius = game_map.sight_reach()
+        if open_plan and radius is None:
+            if self.everything is None:
+                self.everything = Window(0, 0, self.width, self.height, (1 << (self.width * self.height)) - 1)
+            return self.everything
+        if radius is None:
+            xs, ys = range(self.width), range(self.height)
+        else:
+            # Only look inside the sight window, so big maps stay cheap
+            xs = range(max(0, x0 - radius), min(self.width, x0 + radius + 1))
+            ys = range(max(0, y0 - radius), min(self.height, y0 + radius + 1))
+        window = Window(xs.start, ys.start, len(xs), len(ys))
+        blocks = game_map.blocks_sight
+        bits = 0
+        for y1 in ys:
+            for x1 in xs:
+                if open_plan or not any(blocks(x, y) for x, y in line(x0, y0, x1, y1)):
+                    bits |= 1 << ((y1 - window.y) * window.w + x1 - window.x)
+        window.bits = bits
+        return window
+
+    def can_see(self, x0, y0, x1, y1):
+        return self.visible_from(x0, y0).contains(x1, y1)
+
+
+def sight_table(game_map):
+    """The map's SightTable, rebuilt only when the layout has changed."""
+    table = getattr(game_map, "sight", None)
+    if table is None or table.layout_version != game_map.layout_version:
+        table = game_map.sight = SightTable(game_map)
+    return table
+
+
+def line_of_sight(game_map, viewer, target):
+    """
+    True if viewer can see target: no wall and no other figure in between.
+    Used for thrown weapons (e.g. the Dagger) and attack spells.
+    """
+    if not sight_table(game_map).can_see(viewer.x, viewer.y, target.x, target.y):
+        return False
+    occupants = game_map.occupants
+    return not any(sq in occupants for sq in line(viewer.x, viewer.y, target.x, target.y))
+
+
+class FogOfWar:
+    """
+    What the heroes can see now and have ever seen, as bitsets: one int per
+    map row (bit x = square x) in `visible` and `explored`.
+    """
+
+    def __init__(self, game_map):
+        self.game_map = game_map
+        self.visible = {}  # y -> row bits; rows with nothing in sight are left out
+        self.explored = [0] * game_map.height
+
+    def update(self, heroes):
+        """
+        Recomputes visibility from the heroes' squares. Returns the squares
+        whose visibility changed, found by XOR-ing old and new rows, so only
+        those bits are ever turned into squares.
+        """
+        table = sight_table(self.game_map)
+        now = {}
+        for hero in heroes:
+            if hero.hp <= 0:
+                continue
+            window = table.visible_from(hero.x, hero.y)
+            for y, row in enumerate(window.rows(), window.y):
+                if row:
+                    now[y] = now.get(y, 0) | row << window.x
+        before, self.visible = self.visible, now
+
+        explored = self.explored
+        changed = []
+        for y in before.keys() | now.keys():
+            row = now.get(y, 0)
+            diff = before.get(y, 0) ^ row
+            explored[y] |= diff & row
+            while diff:
+                low = diff & -diff
+                changed.append((low.bit_length() - 1, y))
+                diff ^= low
+        return changed
+
+    def is_visible(self, x, y):
+        return bool(self.visible.get(y, 0) >> x & 1)
+
+    def is_explored(self, x, y):
+        return bool(self.explored[y] >> x & 1)
@@ -0,0 +1,273 @@
+"""
+Headless dungeon-run simulator for heroquest_mobile1.0.py.
+
+Replays the rules of combat() and main()'s floor loop (floors from
+floors.generate_floor, treasure search between rooms, gold rewards) with scripted hero policies
+instead of input(), and without any drawing or sleeps. Runs are split into
+chunks, each chunk gets its own seeded RNG, and chunks are farmed out to a
+process pool so results are reproducible whatever the worker count.
+
+    python simulate.py --runs 200000 --floor 1 --policy caster
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import odds
+import rules
+from advisor import TranspositionTable, advise
+from floors import generate_floor
+
+_MOBILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "heroquest_mobile1.0.py")
+
+
+def load_mobile():
+    """Imports heroquest_mobile1.0.py (the dot in its name blocks a plain import)."""
+    spec = importlib.util.spec_from_file_location("heroquest_mobile", _MOBILE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+mobile = load_mobile()
+GAME_DATA = mobile.GAME_DATA
+MONSTERS = list(GAME_DATA["monsters"].keys())
+POTION = "Potion of Healing"
+
+
+# --- 1. HERO POLICIES ---
+# A combat policy picks "A", "D", "M" or "I" for a hero, just like the
+# Command prompt in combat(). Anything combat() ignores is a wasted turn.
+# Policies see the hero, the foe, the party and the inventory.
+
+# The advisor searches a fixed number of rounds deep (not against the clock,
+# as in play) into a table that's fresh for every chunk, so a seed gives
+# the same results on any machine and with any worker count
+ADVISOR_DEPTH = 1
+_advisor_table = TranspositionTable()
+
+
+def policy_attack(hero, foe, party, inv):
+    return "A"
+
+
+def policy_caster(hero, foe, party, inv):
+    return "M" if hero.spells else "A"
+
+
+def policy_cautious(hero, foe, party, inv):
+    if hero.hp <= 2 and foe.hp > 4:
+        return "I" if POTION in inv else "D"
+    return "M" if hero.spells and foe.hp >= 4 else "A"
+
+
+def policy_advisor(hero, foe, party, inv):
+    """Expectimax search (advisor.py), ADVISOR_DEPTH rounds deep."""
+    return advise(party, foe, party.index(hero), inv.count(POTION), depth=ADVISOR_DEPTH, table=_advisor_table)
+
+
+# A search policy answers "Search for Treasure? (Y/N)" between rooms.
+
+
+def search_always(party):
+    return True
+
+
+def search_never(party):
+    return False
+
+
+def search_when_safe(party):
+    return party[0].hp > 2
+
+
+POLICIES = {
+    "attack": policy_attack,
+    "caster": policy_caster,
+    "cautious": policy_cautious,
+    "advisor": policy_advisor,
+}
+
+SEARCH_POLICIES = {
+    "always": search_always,
+    "never": search_never,
+    "safe": search_when_safe,
+}
+
+
+# --- 2. HEADLESS ENGINE ---
+# Every hit goes through the rules core (mobile's strike() and
+# rules.damage), so rule changes there reach the simulator too. Events are
+# dropped.
+
+SINK = mobile.EVENT_SINK = rules.NullSink()
+
+
+def combat(party, rng, policy, m_name=None, inv=None):
+    """combat() without the UI. Potions drunk are taken out of inv. Returns (gold won, rounds fought)."""
+    inv = [] if inv is None else inv
+    m_name = m_name or rng.choice(MONSTERS)
+    foe = mobile.Character(m_name, m_name)
+    rounds = 0
+
+    while foe.hp > 0 and any(h.hp > 0 for h in party):
+        rounds += 1
+        for h in party:
+            if h.hp <= 0 or foe.hp <= 0:
+                continue
+            h.defending = False
+            act = policy(h, foe, party, inv)
+            if act == "A":
+                mobile.strike(h, foe, h.calculate_atk(), foe.base_def, rng)
+            elif act == "M" and h.spells:
+                h.spells.pop(0)
+                foe.hp, events = rules.damage(foe.name, foe.hp, 4)
+                rules.emit(events, SINK)
+            elif act == "D":
+                h.defending = True
+            elif act == "I" and POTION in inv:
+                inv.remove(POTION)
+                h.hp = min(h.max_hp, h.hp + rng.randint(1, 6))
+
+        if foe.hp > 0:
+            t = rng.choice([h for h in party if h.hp > 0])
+            mobile.strike(foe, t, foe.base_atk, t.calculate_def(), rng)
+
+    return (foe.reward if foe.hp <= 0 else 0), rounds
+
+
+def run_floors(rng, floor=1, floors=1, policy=policy_attack, search=search_when_safe):
+    """Plays `floors` consecutive floors with a fresh party, as main() does."""
+    party = mobile.new_party()
+    inv = [POTION] * 2  # main()'s starting inventory
+    gold = rooms_cleared = traps = rounds = 0
+    # No prefetch thread here: the pool already keeps every core busy
+    seed = rng.getrandbits(32)
+
+    for f in range(floor, floor + floors):
+        plan = generate_floor(seed, f, GAME_DATA)["rooms"]
+        rooms = len(plan)
+        for r, room in enumerate(plan, start=1):
+            if not any(h.hp > 0 for h in party):
+                break
+            won, fought = combat(party, rng, policy, room["monster"], inv)
+            gold += won
+            rounds += fought
+            rooms_cleared += 1 if won else 0
+            if r < rooms and search(party):
+                found = room["treasure"]
+                if "trap" in found:
+                    party[0].hp, events = rules.damage(party[0].name, party[0].hp, found["trap"])
+                    rules.emit(events, SINK)
+                    traps += 1
+                else:
+                    gold += found["gold"]
+        if not any(h.hp > 0 for h in party):
+            break
+        for h in party:
+            h.spells = GAME_DATA["heroes"][h.char_class]["spells"].copy()
+
+    return {
+        "survived": any(h.hp > 0 for h in party),
+        "gold": gold,
+        "rooms": rooms_cleared,
+        "traps": traps,
+        "rounds": rounds,
+        "dead": [h.char_class for h in party if h.hp <= 0],
+    }
+
+
+# --- 3. AGGREGATION & POOL ---
+
+
+def empty_totals():
+    return {"runs": 0, "survived": 0, "gold": 0, "rooms": 0, "traps": 0, "rounds": 0, "deaths": {}}
+
+
+def merge(totals, part):
+    for key in ("runs", "survived", "gold", "rooms", "traps", "rounds"):
+        totals[key] += part[key]
+    for name, n in part["deaths"].items():
+        totals["deaths"][name] = totals["deaths"].get(name, 0) + n
+    return totals
+
+
+def run_chunk(job):
+    """Worker entry point. job = (seed, chunk index, runs, floor, floors, policy, search)."""
+    global _advisor_table
+    seed, index, runs, floor, floors, policy, search = job
+    rng = random.Random(f"{seed}:{index}")
+    _advisor_table = TranspositionTable()
+    policy, search = POLICIES[policy], SEARCH_POLICIES[search]
+    totals = empty_totals()
+    for _ in range(runs):
+        res = run_floors(rng, floor, floors, policy, search)
+        totals["runs"] += 1
+        totals["survived"] += res["survived"]
+        totals["gold"] += res["gold"]
+        totals["rooms"] += res["rooms"]
+        totals["traps"] += res["traps"]
+        totals["rounds"] += res["rounds"]
+        for name in res["dead"]:
+            totals["deaths"][name] = totals["deaths"].get(name, 0) + 1
+    return totals
+
+
+def simulate(runs, floor=1, floors=1, policy="attack", search="safe", seed=0, workers=None, chunk=2000):
+    """Yields running totals as each chunk of runs finishes."""
+    jobs = []
+    for index, start in enumerate(range(0, runs, chunk)):
+        jobs.append((seed, index, min(chunk, runs - start), floor, floors, policy, search))
+
+    if policy == "advisor":
+        # Fill the odds table (and its file) once, so workers only read it
+        odds.precompute()
+
+    totals = empty_totals()
+    if workers == 1:
+        for job in jobs:
+            yield merge(totals, run_chunk(job))
+        return
+    with Pool(workers) as pool:
+        for part in pool.imap_unordered(run_chunk, jobs):
+            yield merge(totals, part)
+
+
+def summary(totals):
+    runs = max(1, totals["runs"])
+    return (
+        f"runs {totals['runs']} | survived {totals['survived'] / runs:.1%} | "
+        f"avg gold {totals['gold'] / runs:.1f} | avg rooms {totals['rooms'] / runs:.2f} | "
+        f"avg rounds {totals['rounds'] / runs:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HeroQuest dungeon-run simulator")
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--floor", type=int, default=1)
+    parser.add_argument("--floors", type=int, default=1)
+    parser.add_argument("--policy", choices=POLICIES, default="attack")
+    parser.add_argument("--search", choices=SEARCH_POLICIES, default="safe")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    totals = empty_totals()
+    for totals in simulate(
+        args.runs, args.floor, args.floors, args.policy, args.search, args.seed, args.workers, args.chunk
+    ):
+        print(f"\r{summary(totals)}", end="", flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"\n{totals['runs'] / elapsed * 60:,.0f} runs/min over {elapsed:.1f}s")
+    print(f"deaths: {totals['deaths']}")
+
+
+if __name__ == "__main__":
+    main()
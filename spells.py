@@ -0,0 +1,190 @@
+import random
+
+import rules
+from data import GAME_DATA
+from models import Monster
+
+# ==========================================
+# 1. SPELL REGISTRY
+# ==========================================
+# Every spell in GAME_DATA["spells"] gets a small integer id (in element
+# order), and a hero's hand is an int with one bit per spell id held.
+# Looking a spell up, checking it's in hand and discarding it are all O(1),
+# and a whole element is dealt with a single OR.
+
+
+class SpellRegistry:
+    def __init__(self, game_data=GAME_DATA):
+        by_name = game_data["spells_by_name"]
+        self.spells = []  # id -> spell (frozen dict, with its "element")
+        self.ids = {}  # name -> id
+        self.element_masks = {}  # element -> hand bits of all its spells
+        for element, spells in game_data["spells"].items():
+            mask = 0
+            for spell in spells:
+                spell_id = len(self.spells)
+                self.spells.append(by_name[spell["name"]])
+                self.ids[spell["name"]] = spell_id
+                mask |= 1 << spell_id
+            self.element_masks[element] = mask
+
+    def aimed(self, spell_name):
+        """True if the spell is cast at a monster (targeted or area), not at the caster."""
+        spell_id = self.ids.get(spell_name)
+        if spell_id is None:
+            return False
+        spell = self.spells[spell_id]
+        return bool(spell.get("area")) or spell["type"] in TARGETED
+
+    def hand_names(self, hand):
+        """Names of the spells whose bits are set in `hand`, in id order."""
+        return [spell["name"] for i, spell in enumerate(self.spells) if hand >> i & 1]
+
+    def cast(self, caster, spell_id, target=None, game_map=None, rng=random, sink=None):
+        """
+        Works out who the spell hits and runs its effect. Returns False (and
+        leaves the hand alone) if a targeted spell has nobody to hit.
+        """
+        spell = self.spells[spell_id]
+        if spell.get("area"):
+            centre = target or caster
+            if game_map is not None:
+                targets = [
+                    e for e in in_area(game_map, centre.x, centre.y, spell["area"]) if is_enemy(caster, e)
+                ]
+            else:
+                targets = [target] if target is not None else []
+        elif spell["type"] in TARGETED:
+            targets = [target] if target is not None else []
+        else:
+            # Heal, Buff and Utility spells only ever work on the caster
+            targets = [caster]
+
+        if not targets and spell["type"] in TARGETED:
+            rules.emit([{"type": "no_target", "caster": _name(caster), "spell": spell["name"]}], sink)
+            return False
+        events = [{"type": "cast", "caster": _name(caster), "spell": spell["name"]}]
+        events += EFFECTS[spell["type"]](caster, spell, targets, rng)
+        rules.emit(events, sink)
+        return True
+
+
+_registry = None
+
+
+def registry():
+    """The shared registry, built on first use (GAME_DATA loads lazily)."""
+    global _registry
+    if _registry is None:
+        _registry = SpellRegistry()
+    return _registry
+
+
+# ==========================================
+# 2. SPATIAL QUERY
+# ==========================================
+
+
+def in_area(game_map, x, y, radius):
+    """
+    Everything standing within `radius` squares of (x, y) (a square area, as
+    on the board). Looks at whichever is smaller: the squares in the area or
+    the figures on the map.
+    """
+    occupants = game_map.occupants
+    if (2 * radius + 1) ** 2 <= len(occupants):
+        found = []
+        for sy in range(y - radius, y + radius + 1):
+            for sx in range(x - radius, x + radius + 1):
+                entity = occupants.get((sx, sy))
+                if entity is not None:
+                    found.append(entity)
+        return found
+    return [e for (ex, ey), e in occupants.items() if abs(ex - x) <= radius and abs(ey - y) <= radius]
+
+
+def is_enemy(caster, other):
+    return other.hp > 0 and isinstance(other, Monster) != isinstance(caster, Monster)
+
+
+# ==========================================
+# 3. EFFECTS
+# ==========================================
+# One handler per spell "type". Each takes every target at once, so an area
+# spell is a single call however many figures it catches, and returns the
+# rules events for what happened.
+
+TARGETED = {"Attack", "CC"}
+
+
+def _name(entity):
+    return getattr(entity, "name", entity.char_class)
+
+
+def _attack(caster, spell, targets, rng):
+    """Spells with "dice" roll them against the target's defence; others do fixed "damage"."""
+    events = []
+    for target in targets:
+        if "dice" in spell:
+            skulls = rules.combat_dice(spell["dice"], rng)["skulls"]
+            blocks = rules.combat_dice(target.calculate_defence_dice(), rng)[target.defence_key]
+            dealt = max(0, skulls - blocks)
+        else:
+            dealt = spell.get("damage", 1)
+        if dealt > 0:
+            target.hp, hurt = rules.damage(target.char_class, target.hp, dealt)
+            events += hurt
+        else:
+            events.append({"type": "resisted", "target": target.char_class, "spell": spell["name"]})
+    return events
+
+
+def _max_hp(entity):
+    section = "monsters" if isinstance(entity, Monster) else "heroes"
+    return GAME_DATA[section].get(entity.char_class, {}).get("hp", entity.hp)
+
+
+def _heal(caster, spell, targets, rng):
+    events = []
+    for target in targets:
+        target.hp = min(_max_hp(target), target.hp + spell.get("value", 1))
+        events.append({"type": "heal", "target": _name(target), "hp": target.hp})
+    return events
+
+
+def _buff(caster, spell, targets, rng):
+    """Lasts "turns" rounds (default 1: this one, Zargon's phase included)."""
+    stat = spell.get("stat")
+    bonus = spell.get("bonus", 0)
+    for target in targets:
+        if hasattr(target, "apply_buff"):
+            target.apply_buff(
+                spell["name"],
+                attack_bonus=bonus if stat == "attack" else 0,
+                defence_bonus=bonus if stat == "defence" else 0,
+                rounds=spell.get("turns", 1),
+            )
+    return []
+
+
+def _control(caster, spell, targets, rng):
+    turns = spell.get("turns", 1)
+    events = []
+    for target in targets:
+        target.held = max(target.held, turns)
+        events.append({"type": "held", "target": target.char_class, "spell": spell["name"], "turns": turns})
+    return events
+
+
+def _utility(caster, spell, targets, rng):
+    """No board rules for these yet; recorded as a buff so callers can check for it."""
+    return _buff(caster, spell, targets, rng)
+
+
+EFFECTS = {
+    "Attack": _attack,
+    "Heal": _heal,
+    "Buff": _buff,
+    "CC": _control,
+    "Utility": _utility,
+}
@@ -0,0 +1,33 @@
+import asyncio
+import os
+
+from keyboard import KeyReader
+
+
+def read_keys(*chunks):
+    """Everything a KeyReader on a pipe hands out for the given writes."""
+
+    async def run():
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd, "rb", buffering=0) as stream:
+            async with KeyReader(stream) as keys:
+                for chunk in chunks:
+                    os.write(write_fd, chunk)
+                    await asyncio.sleep(0.01)  # one read per chunk
+                os.close(write_fd)
+                found = []
+                while (key := await keys.get()) is not None:
+                    found.append(key)
+                return found
+
+    return asyncio.run(run())
+
+
+def test_arrow_keys_arrive_whole():
+    assert read_keys(b"\x1b[A") == ["up"]
+    assert read_keys(b"\x1b[Bf\x1bOC\x1b[1;5D") == ["down", "f", "right"]
+    assert read_keys(b"\x1b[", b"D") == ["left"]
+
+
+def test_lone_escape_is_a_key():
+    assert read_keys(b"cfi\x1b") == ["c", "f", "i", "\x1b"]
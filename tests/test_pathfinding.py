@@ -0,0 +1,59 @@
+from collections import deque
+
+import numpy as np
+
+from map import Map
+from models import spawn_hero, spawn_monster
+from pathfinding import ORTHOGONAL, UNREACHABLE, attack_distances, path_to_attack
+
+
+def test_cached_field_survives_moves_and_paths_route_around_figures():
+    game_map = Map(7, 3)
+    hero = spawn_hero("Hero", "Barbarian", x=6, y=1)
+    goblin = spawn_monster("Goblin", x=0, y=1)
+    for entity in (hero, goblin):
+        game_map.place(entity)
+
+    assert path_to_attack(game_map, goblin, hero) == [(1, 1), (2, 1), (3, 1), (4, 1), (5, 1)]
+    (field,) = game_map.distance_fields.values()
+
+    orc = spawn_monster("Orc", x=3, y=1)
+    game_map.place(orc)
+    path = path_to_attack(game_map, goblin, hero)
+    assert list(game_map.distance_fields.values()) == [field]
+    assert len(path) == 7 and (3, 1) not in path and path[-1] in ((5, 1), (6, 0), (6, 2))
+
+    game_map.set_wall(2, 0)
+    assert game_map.distance_fields == {}
+
+
+def test_attack_distances_match_a_plain_search_and_stop_at_the_goals():
+    rnd = np.random.default_rng(3)
+    passable = rnd.random((15, 20)) > 0.25
+    xs, ys = np.array([4, 15]), np.array([3, 11])
+    dist = attack_distances(passable, xs, ys)
+
+    # Plain BFS: the figures and walls block, the squares round one score 1
+    figures = set(zip(xs.tolist(), ys.tolist()))
+
+    def neighbours(x, y):
+        for dx, dy in ORTHOGONAL:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 20 and 0 <= ny < 15 and passable[ny, nx] and (nx, ny) not in figures:
+                yield nx, ny
+
+    expected = {sq: 1 for figure in figures for sq in neighbours(*figure)}
+    frontier = deque(expected)
+    while frontier:
+        sq = frontier.popleft()
+        for nxt in neighbours(*sq):
+            if nxt not in expected:
+                expected[nxt] = expected[sq] + 1
+                frontier.append(nxt)
+    assert {(x, y): d for (y, x), d in np.ndenumerate(dist) if d != UNREACHABLE} == expected
+
+    # With goals it stops early, but everything up to the farthest is exact
+    near = [sq for sq, d in expected.items() if d <= 3]
+    partial = attack_distances(passable, xs, ys, goal_xs=[x for x, _ in near], goal_ys=[y for _, y in near])
+    assert all(partial[y, x] == d for (x, y), d in expected.items() if d <= 3)
+    assert (partial != UNREACHABLE).sum() < len(expected)
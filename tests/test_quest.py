@@ -0,0 +1,23 @@
+import os
+
+from models import spawn_hero
+from quest import Quest
+
+TRIAL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "quests", "the_trial.quest")
+
+
+def test_treasure_is_credited_to_the_hero():
+    quest = Quest(TRIAL)
+    quest.start()
+    hero = spawn_hero("Sigmar", "Barbarian", x=5, y=5)
+    quest.step_on(hero)
+    assert hero.gold == 10
+
+    quest.enter(12, 16)
+    hero.x, hero.y = 12, 16
+    quest.step_on(hero)
+    assert hero.inventory == ["Potion of Healing"]
+
+    # A chest can only be emptied once
+    quest.step_on(hero)
+    assert hero.inventory == ["Potion of Healing"]
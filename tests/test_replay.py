@@ -0,0 +1,28 @@
+import os
+
+import main
+from main import capture, handle_key, new_game, replay
+from rng import GameRNG
+
+QUEST = os.path.join(os.path.dirname(main.__file__), "quests", "the_trial.quest")
+
+
+def snapshot(state):
+    figures = [state.player] + state.monsters
+    return [(f.char_class, f.x, f.y, f.hp) for f in figures], state.player.gold, state.turns.round
+
+
+def test_a_logged_game_replays_to_the_same_state(tmp_path):
+    # What start_game does, with keys typed straight into the state
+    rng = GameRNG(11)
+    state, _ = capture(new_game, rng.external("quest", lambda: QUEST), rng)
+    state.next_turn()
+    for key in "ddd" + "sss" + "f" + "e" + "ddww" + "f" + "e" + "c" + "Fire of Wrath\n" + "e" + "e":
+        rng.command(key)
+        capture(handle_key, state, key)
+    path = str(tmp_path / "replay.json")
+    rng.save(path)
+
+    replayed = capture(replay, path)[0]
+    assert snapshot(replayed) == snapshot(state)
+    assert state.turns.round > 3
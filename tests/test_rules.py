@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import rules
+from rules import BLOCKS, DAMAGE, OUTCOME, SKIPPED, SKULLS, SLAIN, STRUCK
+
+np = pytest.importorskip("numpy")
+
+
+def sequential(attackers, targets, skulls, blocks, hp):
+    """The rules one pair at a time, from the dice attack_batch rolled."""
+    left = list(hp)
+    rows = []
+    for a, t, s, b in zip(attackers, targets, skulls, blocks):
+        if left[a] <= 0 or left[t] <= 0:
+            rows.append((s, b, 0, left[t], SKIPPED))
+            continue
+        left[t] = max(0, left[t] - max(0, s - b))
+        rows.append((s, b, max(0, s - b), left[t], SLAIN if left[t] == 0 else STRUCK))
+    return left, rows
+
+
+def check(attackers, targets, hp, seed):
+    n = len(targets)
+    rng = np.random.default_rng(seed)
+    after, results = rules.attack_batch(attackers, targets, 6, 1, [1 / 6] * n, hp, rng)
+    left, rows = sequential(attackers, targets, results[:, SKULLS], results[:, BLOCKS], hp)
+    assert after.tolist() == left
+    assert results.tolist() == [list(row) for row in rows]
+    return results
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_both_paths_match_resolving_pairs_in_order(seed):
+    picker = random.Random(seed)
+    # 0-3 attack, 4-6 defend; 3 and 6 start dead. Several attackers per
+    # target and 6 skull dice against 1 block means plenty of overkill.
+    hp = [2, 3, 1, 0, 4, 2, 0]
+    attackers = [picker.randrange(4) for _ in range(12)]
+    targets = [picker.randrange(4, 7) for _ in range(12)]
+    one_sided = check(attackers, targets, hp, seed)
+
+    # The same fight, but a defender hits back first: the loop path
+    attackers, targets = [4] + attackers + [0], [0] + targets + [5]
+    assert not set(attackers).isdisjoint(targets)
+    two_sided = check(attackers, targets, hp, seed)
+
+    for results in (one_sided, two_sided):
+        assert (results[:, DAMAGE] <= results[:, SKULLS]).all()
+
+
+def test_overkill_and_dead_fighters_are_skipped():
+    # Three on one target with 1 hp, plus a dead attacker and a dead target
+    rng = np.random.default_rng(0)
+    hp = [3, 3, 3, 0, 1, 0]
+    after, results = rules.attack_batch(
+        [0, 1, 2, 3, 0], [4, 4, 4, 4, 5], 6, 0, [0.0] * 5, hp, rng
+    )
+    assert results[:, OUTCOME].tolist()[1:] == [SKIPPED] * 4
+    assert results[0, OUTCOME] == SLAIN
+    assert results[1:, DAMAGE].tolist() == [0] * 4
+    assert after.tolist()[:4] == [3, 3, 3, 0] and after[5] == 0
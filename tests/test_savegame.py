@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+import savegame
+from savegame import SaveJournal
+
+
+def test_write_error_reaches_flush_and_writer_recovers(tmp_path, monkeypatch):
+    journal = SaveJournal(str(tmp_path / "save.json"))
+    journal.record({"gold": 1})
+    journal.flush()
+
+    def disk_full(fd):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(savegame.os, "fsync", disk_full)
+    journal.record({"gold": 2})
+    with pytest.raises(OSError):
+        journal.flush()
+
+    monkeypatch.undo()
+    journal.record({"gold": 3})
+    journal.flush()
+    assert journal.load() == {"gold": 3}
+    journal.close()
+
+
+def test_unserializable_state_is_refused_before_queueing(tmp_path):
+    journal = SaveJournal(str(tmp_path / "save.json"))
+    with pytest.raises(TypeError):
+        journal.record({"gold": object()})
+    journal.flush()
+    journal.close()
+    with pytest.raises(RuntimeError):
+        journal.record({"gold": 4})
+
+
+def test_a_hero_removed_from_the_party_stays_gone(tmp_path):
+    party = [{"name": "Sigmar", "hp": 8}, {"name": "Grungi", "hp": 0}]
+    before, after = {"gold": 5, "heroes": party}, {"gold": 5, "heroes": party[:1]}
+    assert savegame.apply(json.loads(json.dumps(before)), savegame.diff(before, after)) == after
+
+    journal = SaveJournal(str(tmp_path / "save.json"))
+    journal.record(before)
+    journal.record(after)
+    journal.close()
+    reopened = SaveJournal(str(tmp_path / "save.json"))
+    assert reopened.load() == after
+    reopened.close()
@@ -0,0 +1,27 @@
+from map import SIGHT_RADIUS, Map
+from models import spawn_hero
+from sight import FogOfWar, sight_table
+
+
+def test_fog_reports_only_the_squares_that_changed():
+    game_map = Map(12, 3, sight_radius=2)
+    hero = spawn_hero("Hero", "Barbarian", x=2, y=1)
+    game_map.place(hero)
+    fog = FogOfWar(game_map)
+
+    first = fog.update([hero])
+    assert sorted(first) == [(x, y) for x in range(5) for y in range(3)]
+    assert fog.update([hero]) == []
+
+    game_map.move(hero, 1, 0)
+    assert sorted(fog.update([hero])) == [(0, 0), (0, 1), (0, 2), (5, 0), (5, 1), (5, 2)]
+    assert not fog.is_visible(0, 1) and fog.is_explored(0, 1)
+    assert fog.is_visible(5, 1) and not fog.is_explored(6, 1)
+
+
+def test_big_maps_see_a_bounded_window_by_default():
+    assert Map().sight_reach() is None
+    game_map = Map(200, 200)
+    game_map.set_wall(10, 10)
+    window = sight_table(game_map).visible_from(100, 100)
+    assert (window.w, window.h) == (2 * SIGHT_RADIUS + 1, 2 * SIGHT_RADIUS + 1)
@@ -0,0 +1,35 @@
+from models import spawn_hero, spawn_monster
+from turns import ZARGON, TurnScheduler
+
+
+def test_buff_lasts_until_the_end_of_the_round():
+    wizard = spawn_hero("Gandalf", "Wizard", chosen_spells=["Fire", "Earth"])
+    base_attack = wizard.calculate_attack_dice()
+    base_defence = wizard.calculate_defence_dice()
+    turns = TurnScheduler([wizard])
+
+    assert turns.next_turn() == (0, wizard)
+    assert wizard.cast_spell("Courage")
+    assert wizard.cast_spell("Rock Skin")
+    assert wizard.calculate_attack_dice() == base_attack + 2
+    assert wizard.calculate_defence_dice() == base_defence + 1
+
+    # Still up for Zargon's phase...
+    assert turns.next_turn() == (1, ZARGON)
+    assert wizard.calculate_defence_dice() == base_defence + 1
+
+    # ...and gone when the next round starts
+    assert turns.next_turn() == (0, wizard)
+    assert wizard.buffs == {}
+    assert wizard.calculate_attack_dice() == base_attack
+    assert wizard.calculate_defence_dice() == base_defence
+
+
+def test_heal_targets_the_caster_even_with_a_monster_picked():
+    wizard = spawn_hero("Gandalf", "Wizard", chosen_spells=["Earth"])
+    goblin = spawn_monster("Goblin")
+    goblin.hp = 1
+    wizard.hp = 1
+    assert wizard.cast_spell("Heal Body", target=goblin)
+    assert wizard.hp == 4
+    assert goblin.hp == 1
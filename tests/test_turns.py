@@ -0,0 +1,31 @@
+from map import Map
+from models import spawn_hero, spawn_monster
+from turns import zargon_phase
+
+
+def test_monsters_never_plan_onto_a_fallen_hero():
+    game_map = Map(10, 3)
+    fallen = spawn_hero("Fallen", "Dwarf", x=3, y=1)
+    fallen.hp = 0
+    hero = spawn_hero("Standing", "Barbarian", x=0, y=1)
+    goblin = spawn_monster("Goblin", x=6, y=1)
+    for entity in (fallen, hero, goblin):
+        assert game_map.place(entity)
+
+    for _ in range(3):
+        zargon_phase(game_map, [fallen, hero], [goblin])
+        assert game_map.occupant_at(goblin.x, goblin.y) is goblin
+        assert game_map.occupant_at(3, 1) is fallen
+
+
+def test_relocate_lets_figures_follow_and_keeps_the_blocked_in_place():
+    game_map = Map(5, 1)
+    a, b, c = (spawn_monster("Goblin", x=x, y=0) for x in (0, 1, 3))
+    for entity in (a, b, c):
+        game_map.place(entity)
+    # a follows b; c wants b's old square too but a got there first
+    stuck = game_map.relocate([(b, 2, 0), (a, 1, 0), (c, 1, 0)])
+    assert stuck == [c]
+    assert (a.x, b.x, c.x) == (1, 2, 3)
+    assert game_map.occupants == {(1, 0): a, (2, 0): b, (3, 0): c}
+
@@ -0,0 +1,205 @@
+import random
+from heapq import heappop, heappush
+
+import numpy as np
+
+import rules
+from instrument import timed
+from models import resolve_attacks
+from pathfinding import ORTHOGONAL, UNREACHABLE, attack_distances, passable_grid
+
+# ==========================================
+# 1. TURN SCHEDULER
+# ==========================================
+# Each round every hero gets a turn (in party order), then Zargon (the game
+# master) takes one turn that moves and attacks with every monster at once.
+# Turns sit in a priority queue keyed on (round, phase, order); a hero who
+# falls before their turn comes up is skipped when it's popped.
+
+HERO_PHASE = 0
+ZARGON_PHASE = 1
+ZARGON = "Zargon"
+
+
+class TurnScheduler:
+    def __init__(self, heroes):
+        self.heroes = heroes
+        self.round = 0
+        self._queue = []
+        self._seq = 0
+
+    def _push(self, round_no, phase, actor):
+        heappush(self._queue, (round_no, phase, self._seq, actor))
+        self._seq += 1
+
+    def _schedule_round(self):
+        # The last round is over: spell buffs cast in it run down
+        if self.round:
+            for hero in self.heroes:
+                hero.expire_buffs()
+        self.round += 1
+        for hero in self.heroes:
+            if hero.hp > 0:
+                self._push(self.round, HERO_PHASE, hero)
+        self._push(self.round, ZARGON_PHASE, ZARGON)
+
+    def next_turn(self):
+        """Returns (phase, actor): a hero, or ZARGON for the monsters' phase."""
+        while True:
+            if not self._queue:
+                self._schedule_round()
+            _, phase, _, actor = heappop(self._queue)
+            if phase == HERO_PHASE and actor.hp <= 0:
+                continue
+            return phase, actor
+
+
+# ==========================================
+# 2. BATCHED MONSTER AI
+# ==========================================
+# Monsters head for the nearest hero and attack once they stand next to one
+# (orthogonally, like Entity.is_adjacent without a diagonal weapon). All of
+# them read the same distance field (pathfinding.attack_distances, stopped
+# once it reaches the farthest monster), built once per Zargon phase, and
+# every movement step is decided for all monsters at once.
+
+def plan_moves(passable, hero_xs, hero_ys, xs, ys, movement, blocked_xs=(), blocked_ys=()):
+    """
+    Moves every monster (arrays xs, ys, movement) down the shared distance
+    field, one square per step, all monsters together. When two want the
+    same square the earlier one (lower index) gets it. blocked_xs/ys are
+    other occupied squares nobody may step on (fallen heroes, figures not
+    moving this phase). Returns new xs, ys and a mask of monsters that end
+    next to a hero.
+    """
+    h, w = passable.shape
+    dist = attack_distances(passable, hero_xs, hero_ys, goal_xs=xs, goal_ys=ys)
+    xs = xs.astype(np.int64).copy()
+    ys = ys.astype(np.int64).copy()
+    left = movement.astype(np.int64).copy()
+
+    occupied = np.zeros(h * w, dtype=bool)
+    occupied[hero_ys * w + hero_xs] = True
+    occupied[ys * w + xs] = True
+    occupied[np.asarray(blocked_ys, dtype=np.int64) * w + np.asarray(blocked_xs, dtype=np.int64)] = True
+
+    for _ in range(int(left.max(initial=0))):
+        here = dist[ys, xs]
+        active = np.flatnonzero((left > 0) & (here > 1) & (here != UNREACHABLE))
+        if not len(active):
+            break
+
+        # Best orthogonal neighbour for each active monster
+        best = here[active].copy()
+        best_x, best_y = xs[active].copy(), ys[active].copy()
+        for dx, dy in ORTHOGONAL:
+            nx, ny = xs[active] + dx, ys[active] + dy
+            inside = (nx >= 0) & (nx < w) & (ny >= 0) & (ny < h)
+            nxc, nyc = np.clip(nx, 0, w - 1), np.clip(ny, 0, h - 1)
+            d = np.where(inside & ~occupied[nyc * w + nxc], dist[nyc, nxc], UNREACHABLE)
+            better = d < best
+            best = np.where(better, d, best)
+            best_x = np.where(better, nxc, best_x)
+            best_y = np.where(better, nyc, best_y)
+
+        moving = best < here[active]
+        movers = active[moving]
+        targets = (best_y * w + best_x)[moving]
+        # One monster per square: keep the first claim on each target
+        _, first = np.unique(targets, return_index=True)
+        movers, targets = movers[first], targets[first]
+
+        occupied[ys[movers] * w + xs[movers]] = False
+        occupied[targets] = True
+        xs[movers], ys[movers] = targets % w, targets // w
+        left[active] -= 1
+        left[active[~moving]] = 0  # stuck this turn
+
+    return xs, ys, dist[ys, xs] == 1
+
+
+# ==========================================
+# 3. ZARGON PHASE
+# ==========================================
+
+
+def _adjacent_hero(monster, heroes):
+    for hero in heroes:
+        if hero.hp > 0 and monster.is_adjacent(hero):
+            return hero
+    return None
+
+
+@timed("monster_ai")
+def zargon_phase(game_map, heroes, monsters, rng=random, sink=None):
+    """
+    Plays the monsters' turn for Monster objects on `game_map`: batch move,
+    then every monster next to a hero attacks it, all in one resolve_attacks
+    batch with dice from a generator seeded off `rng`. Monsters held by a
+    spell stand still and don't attack, using up one turn of the hold.
+    Returns the attackers.
+    """
+    alive = [m for m in monsters if m.hp > 0]
+    living_heroes = [h for h in heroes if h.hp > 0]
+    if not alive or not living_heroes:
+        return []
+    # Held monsters still block squares, so they are planned with no movement
+    held = np.array([m.held > 0 for m in alive])
+    for m in alive:
+        if m.held:
+            m.held -= 1
+
+    # Everything else on the board (a fallen hero, say) is in the way too
+    moving = {id(m) for m in alive} | {id(h) for h in living_heroes}
+    others = [sq for sq, e in game_map.occupants.items() if id(e) not in moving]
+    xs, ys, ready = plan_moves(
+        passable_grid(game_map),
+        np.array([h.x for h in living_heroes]),
+        np.array([h.y for h in living_heroes]),
+        np.array([m.x for m in alive]),
+        np.array([m.y for m in alive]),
+        np.where(held, 0, [m.base_movement for m in alive]),
+        [x for x, _ in others],
+        [y for _, y in others],
+    )
+    ready &= ~held
+
+    # One board update for the whole horde. Anyone whose square turned out
+    # to be taken stays where it was, still on the board, and doesn't attack.
+    stuck = {id(m) for m in game_map.relocate(list(zip(alive, xs.tolist(), ys.tolist())))}
+    ready &= np.array([id(m) not in stuck for m in alive])
+
+    # Every ready monster attacks in one batch. One whose hero drops earlier
+    # in the batch is skipped, and tries another adjacent hero next batch.
+    dice = np.random.default_rng(rng.randint(0, 2**32 - 1))
+    attackers = []
+    pending = [alive[i] for i in np.flatnonzero(ready).tolist()]
+    while pending:
+        pairs = [(m, hero) for m in pending if (hero := _adjacent_hero(m, living_heroes)) is not None]
+        if not pairs:
+            break
+        outcomes = resolve_attacks(pairs, dice, sink)[:, rules.OUTCOME].tolist()
+        attackers += [m for (m, _), outcome in zip(pairs, outcomes) if outcome != rules.SKIPPED]
+        pending = [m for (m, _), outcome in zip(pairs, outcomes) if outcome == rules.SKIPPED]
+    return attackers
+
+
+def zargon_phase_table(table, game_map, heroes):
+    """
+    Moves a horde stored in a horde.EntityTable. Returns the row numbers of
+    monsters that ended next to a hero (ready to attack).
+    """
+    rows = table.alive()
+    living_heroes = [h for h in heroes if h.hp > 0]
+    if not len(rows) or not living_heroes:
+        return rows[:0]
+    xs, ys, ready = plan_moves(
+        passable_grid(game_map),
+        np.array([h.x for h in living_heroes]),
+        np.array([h.y for h in living_heroes]),
+        table.x[rows],
+        table.y[rows],
+        table.movement[rows],
+    )
+    table.x[rows], table.y[rows] = xs, ys
+    return rows[ready]